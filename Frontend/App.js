@@ -13,9 +13,14 @@
         let isLoggedIn = false;
         let authToken = null; 
         let currentServiceForBooking = null;
-        let allUsers = [];
         let services = [];
         let bookings = [];
+        let bookingSocket = null;
+        let bookingSocketDelay = 1000;
+        let bookingSocketReconnecting = false;
+        let readAfter = null;
+        let servicesCursor = null;
+        const PAGE_SIZE = 50;
     async function firebaseGoogleLogin() {
             const loginErr = document.getElementById('googleLoginError');
             const regErr = document.getElementById('googleRegisterError');
@@ -25,7 +30,7 @@
                 const provider = new firebase.auth.GoogleAuthProvider();
                 const result = await firebase.auth().signInWithPopup(provider);
                 const idToken = await result.user.getIdToken( false);
-                const resp = await fetch(`${API_URL}/auth/firebase/session`, {
+                const resp = await apiFetch(`${API_URL}/auth/firebase/session`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ id_token: idToken })
@@ -39,6 +44,7 @@
                 isLoggedIn = true;
                 localStorage.setItem('authToken', authToken);
                 localStorage.setItem('user', JSON.stringify(data.user));
+                connectBookingEvents();
                 showSection('home');
                 await loadServices();
             } catch (err) {
@@ -51,12 +57,63 @@
                 }
             }
         }
+        async function apiFetch(url, options = {}) {
+            const headers = readAfter ? { ...(options.headers || {}), 'X-Read-After': readAfter } : options.headers;
+            const response = await fetch(url, { ...options, headers });
+            const mark = response.headers.get('X-Read-After');
+            if (mark) readAfter = mark;
+            return response;
+        }
         function getAuthHeaders() {
             return {
                 'Authorization': `Bearer ${authToken}`,
                 'Content-Type': 'application/json'
             };
         }
+        function connectBookingEvents() {
+            if (!authToken || bookingSocket) return;
+            const socket = new WebSocket(`${API_URL.replace(/^http/, 'ws')}/ws/bookings`);
+            bookingSocket = socket;
+            socket.onopen = () => {
+                socket.send(JSON.stringify({ type: 'auth', token: authToken }));
+            };
+            socket.onmessage = (message) => {
+                const event = JSON.parse(message.data);
+                if (event.type === 'subscribed') {
+                    bookingSocketDelay = 1000;
+                    if (bookingSocketReconnecting) {
+                        bookingSocketReconnecting = false;
+                        loadBookings();
+                    }
+                    return;
+                }
+                if (event.type === 'resync' || event.truncated) {
+                    loadBookings();
+                    return;
+                }
+                const index = bookings.findIndex(b => b.id === event.booking.id);
+                if (index === -1) {
+                    bookings.unshift(event.booking);
+                } else if (bookings[index].version <= event.booking.version) {
+                    bookings[index] = event.booking;
+                }
+                displayBookings();
+            };
+            socket.onclose = () => {
+                bookingSocket = null;
+                if (!authToken) return;
+                bookingSocketReconnecting = true;
+                setTimeout(connectBookingEvents, bookingSocketDelay);
+                bookingSocketDelay = Math.min(bookingSocketDelay * 2, 30000);
+            };
+        }
+        function disconnectBookingEvents() {
+            if (!bookingSocket) return;
+            const socket = bookingSocket;
+            bookingSocket = null;
+            socket.onclose = null;
+            socket.close();
+        }
         async function initApp() {
             const savedToken = localStorage.getItem('authToken');
             const savedUser = localStorage.getItem('user');
@@ -67,33 +124,38 @@
                 currentUser.name = user.name;
                 currentUser.email = user.email;
                 isLoggedIn = true;
+                connectBookingEvents();
                 showSection('home');
-                await loadUsers();
                 await loadServices();
                 updateUserStats();
             } else {
                 showSection('auth');
             }
         }
-        async function loadUsers() {
+        async function fetchPage(path, key, cursor = null, options = {}, limit = PAGE_SIZE) {
+            const separator = path.includes('?') ? '&' : '?';
+            const url = `${API_URL}${path}${separator}limit=${limit}${cursor !== null ? `&after=${encodeURIComponent(cursor)}` : ''}`;
+            const response = await apiFetch(url, options);
+            const data = await response.json();
+            if (!data.success) return { success: false };
+            return { success: true, [key]: data[key], next_cursor: data.next_cursor ?? null };
+        }
+        async function fetchAllPages(path, key, options = {}) {
+            let items = [];
+            let cursor = null;
+            do {
+                const data = await fetchPage(path, key, cursor, options, 1000);
+                if (!data.success) return { success: false };
+                items = items.concat(data[key]);
+                cursor = data.next_cursor;
+            } while (cursor !== null);
+            return { success: true, count: items.length, [key]: items };
+        }
+        async function loadSkillsFromBackend(cursor = null) {
             try {
-                const response = await fetch(`${API_URL}/users`);
-                const data = await response.json();
+                const data = await fetchPage('/skills', 'skills', cursor);
                 if (data.success) {
-                    allUsers = data.users;
-                    console.log('Users loaded:', allUsers.length);
-                }
-            } catch (error) {
-                console.error('Error loading users:', error);
-                alert('Failed to load users. Make sure the backend is running!');
-            }
-        }
-        async function loadSkillsFromBackend() {
-            try {
-                const response = await fetch(`${API_URL}/skills`);
-                const data = await response.json();
-                if (data.success) {
-                    services = data.skills.map(skill => ({
+                    const page = data.skills.map(skill => ({
                         id: skill.id,
                         title: skill.skill,
                         provider: skill.user_name || 'Unknown',
@@ -104,6 +166,8 @@
                         reviews: 0,
                         user_id: skill.user_id
                     }));
+                    services = cursor === null ? page : services.concat(page);
+                    servicesCursor = data.next_cursor;
                     console.log('Skills loaded:', services.length);
                 }
             } catch (error) {
@@ -136,7 +200,7 @@
                 return;
             }
             try {
-                const response = await fetch(`${API_URL}/login`, {
+                const response = await apiFetch(`${API_URL}/login`, {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
@@ -155,6 +219,7 @@
                     isLoggedIn = true;
                     localStorage.setItem('authToken', authToken);
                     localStorage.setItem('user', JSON.stringify(data.user));
+                    connectBookingEvents();
                     showSection('home');
                     await loadServices();
                     alert(`Welcome back, ${data.user.name}!`);
@@ -185,7 +250,7 @@
                 return;
             }
             try {
-                const response = await fetch(`${API_URL}/register`, {
+                const response = await apiFetch(`${API_URL}/register`, {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
@@ -207,6 +272,7 @@
                     isLoggedIn = true;
                     localStorage.setItem('authToken', authToken);
                     localStorage.setItem('user', JSON.stringify(data.user));
+                    connectBookingEvents();
                     showSection('home');
                     await loadServices();
                     alert(`Welcome to HelpX, ${name}!`);
@@ -219,6 +285,7 @@
             }
         }
         function logout() {
+            disconnectBookingEvents();
             isLoggedIn = false;
             authToken = null;
             currentUser = {
@@ -259,22 +326,30 @@
             await loadSkillsFromBackend();
             const grid = document.getElementById('servicesGrid');
             grid.innerHTML = '';
+            updateLoadMoreServices();
             if (services.length === 0) {
                 grid.innerHTML = '<p style="text-align: center; color: #999; padding: 2rem;">No services available yet. Be the first to post a service!</p>';
                 return;
             }
-            services.forEach(service => {
-                const serviceCard = createServiceCard(service);
-                grid.appendChild(serviceCard);
-            });
+            filterServices();
+        }
+        async function loadMoreServices() {
+            if (servicesCursor === null) return;
+            const button = document.getElementById('loadMoreServices');
+            button.disabled = true;
+            await loadSkillsFromBackend(servicesCursor);
+            button.disabled = false;
+            filterServices();
+        }
+        function updateLoadMoreServices() {
+            document.getElementById('loadMoreServices').style.display = servicesCursor === null ? 'none' : 'inline-block';
         }
         async function loadBookings() {
             if (!authToken) return;
             try {
-                const response = await fetch(`${API_URL}/bookings`, {
+                const data = await fetchAllPages('/bookings', 'bookings', {
                     headers: getAuthHeaders()
                 });
-                const data = await response.json();
                 if (data.success) {
                     bookings = data.bookings;
                     console.log('Bookings loaded:', bookings.length);
@@ -346,7 +421,7 @@
         }
         async function updateBookingStatus(bookingId, status) {
             try {
-                const response = await fetch(`${API_URL}/bookings/${bookingId}/status`, {
+                const response = await apiFetch(`${API_URL}/bookings/${bookingId}/status`, {
                     method: 'PATCH',
                     headers: getAuthHeaders(),
                     body: JSON.stringify({ status: status })
@@ -354,7 +429,9 @@
                 const data = await response.json();
                 if (response.ok && data.success) {
                     alert(`Booking ${status}!`);
-                    await loadBookings();
+                    const index = bookings.findIndex(b => b.id === data.booking.id);
+                    if (index !== -1) bookings[index] = data.booking;
+                    displayBookings();
                 } else {
                     alert('Failed to update booking: ' + (data.detail || 'Unknown error'));
                 }
@@ -430,6 +507,7 @@
                 const serviceCard = createServiceCard(service);
                 grid.appendChild(serviceCard);
             });
+            updateLoadMoreServices();
         }
         async function postService(event) {
             event.preventDefault();
@@ -442,7 +520,7 @@
             const description = document.getElementById('serviceDescription').value;
             const rate = parseInt(document.getElementById('serviceRate').value);
             try {
-                const response = await fetch(`${API_URL}/add-skill?skill=${encodeURIComponent(title)}&description=${encodeURIComponent(description)}`, {
+                const response = await apiFetch(`${API_URL}/add-skill?skill=${encodeURIComponent(title)}&description=${encodeURIComponent(description)}`, {
                     method: 'POST',
                     headers: getAuthHeaders()
                 });
@@ -478,8 +556,7 @@
             }
             if (currentUser.id) {
                 try {
-                    const response = await fetch(`${API_URL}/skills?user_id=${currentUser.id}`);
-                    const data = await response.json();
+                    const data = await fetchAllPages(`/skills?user_id=${currentUser.id}`, 'skills');
                     if (data.success) {
                         currentUser.servicesOffered = data.count;
                     }
@@ -524,7 +601,7 @@
                 bookingDate = `${date}T${time}:00`;
             }
             try {
-                const response = await fetch(`${API_URL}/bookings`, {
+                const response = await apiFetch(`${API_URL}/bookings`, {
                     method: 'POST',
                     headers: getAuthHeaders(),
                     body: JSON.stringify({
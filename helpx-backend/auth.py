@@ -1,26 +1,55 @@
+import logging
+import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_read_db, get_async_read_db, use_primary
 from models import User
+from cache import TTLCache
+import passwords
 
 SECRET_KEY = "your-secret-key-here-change-in-production-09876543210"  # Change this in production!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
 
 security = HTTPBearer()
 
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+def cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+def _cache_user(user: User) -> User:
+    snapshot = User(id=user.id, name=user.name, email=user.email, hashed_password=user.hashed_password, bio=user.bio)
+    user_cache.set(user.id, snapshot)
+    return snapshot
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return passwords.hash_password(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await passwords.verify_password_async(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await passwords.hash_password_async(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -41,54 +70,102 @@ def decode_token(token: str) -> dict:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError:
-        print("❌ JWT Error: Token has expired")
+        logger.info("JWT rejected: token has expired", extra={"event": "auth.token_rejected", "reason": "expired"})
         return None
     except jwt.JWTClaimsError as e:
-        print(f"❌ JWT Error: Invalid claims - {e}")
+        logger.info("JWT rejected: invalid claims", extra={"event": "auth.token_rejected", "reason": "claims", "error": str(e)})
         return None
     except JWTError as e:
-        print(f"❌ JWT Error: {type(e).__name__} - {e}")
+        logger.info("JWT rejected", extra={"event": "auth.token_rejected", "reason": type(e).__name__, "error": str(e)})
         return None
     except Exception as e:
-        print(f"❌ Unexpected error decoding token: {type(e).__name__} - {e}")
+        logger.exception("Unexpected error decoding token", extra={"event": "auth.token_error"})
         return None
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _user_id_from_token(token: str) -> int:
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
     
-    token = credentials.credentials
-    print(f"🔍 Received token: {token[:50]}..." if len(token) > 50 else f"🔍 Received token: {token}")
+    logger.debug("Decoding access token", extra={"event": "auth.token_received", "token": token})
     payload = decode_token(token)
     
     if payload is None:
-        print("❌ Token decode failed")
-        raise credentials_exception
+        raise _credentials_exception()
     
-    print(f"✅ Token payload: {payload}")
     user_id_str: str = payload.get("sub")
     if user_id_str is None:
-        print("❌ No user_id in payload")
-        raise credentials_exception
+        logger.info("JWT rejected: no subject", extra={"event": "auth.token_rejected", "reason": "no_subject"})
+        raise _credentials_exception()
     
     try:
         user_id = int(user_id_str)
     except (ValueError, TypeError):
-        print(f"❌ Invalid user_id format: {user_id_str}")
-        raise credentials_exception
+        logger.info("JWT rejected: invalid subject", extra={"event": "auth.token_rejected", "reason": "bad_subject"})
+        raise _credentials_exception()
+    
+    expires_in = payload["exp"] - time.time() if "exp" in payload else AUTH_CACHE_TTL
+    token_cache.set(token, user_id, ttl=expires_in)
+    return user_id
+
+def user_id_from_token(token: str) -> Optional[int]:
+    try:
+        return _user_id_from_token(token)
+    except HTTPException:
+        return None
+
+def token_expires_at(token: str) -> Optional[float]:
+    expires = jwt.get_unverified_claims(token).get("exp")
+    return float(expires) if expires is not None else None
+
+async def load_user_async(db: AsyncSession, user_id: int) -> Optional[User]:
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if user is None:
+        return None
+    return _cache_user(user)
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+) -> User:
+    user_id = _user_id_from_token(credentials.credentials)
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
     
     user = db.query(User).filter(User.id == user_id).first()
+    if user is None and use_primary(db):
+        user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        print(f"❌ User {user_id} not found in database")
-        raise credentials_exception
+        logger.info("JWT subject not found", extra={"event": "auth.unknown_user", "user_id": user_id})
+        raise _credentials_exception()
+    
+    logger.debug("Authenticated user", extra={"event": "auth.authenticated", "user_id": user.id})
+    return _cache_user(user)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> User:
+    user_id = _user_id_from_token(credentials.credentials)
+    
+    user = await load_user_async(db, user_id)
+    if user is None and use_primary(db):
+        user = await load_user_async(db, user_id)
+    if user is None:
+        logger.info("JWT subject not found", extra={"event": "auth.unknown_user", "user_id": user_id})
+        raise _credentials_exception()
     
-    print(f"✅ Authenticated user: {user.name} (ID: {user.id})")
     return user
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
@@ -98,3 +175,16 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     if not verify_password(password, user.hashed_password):
         return None
     return user
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+    if not user:
+        return None
+    verified, new_hash = await passwords.verify_and_update_async(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        invalidate_user(user.id)
+    return user
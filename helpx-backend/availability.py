@@ -0,0 +1,204 @@
+import bisect
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, String, and_, cast, exists, func, literal, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from cache import TTLCache
+from models import Booking
+
+MAX_BOOKING_HOURS = int(os.getenv("MAX_BOOKING_HOURS", "24"))
+MAX_AVAILABILITY_DAYS = int(os.getenv("MAX_AVAILABILITY_DAYS", "31"))
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", "10000"))
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", "30"))
+
+BLOCKING_STATUSES = ("accepted", "completed")
+OVERLAP_CONSTRAINT = "bookings_no_overlap"
+DURATION_CONSTRAINT = "bookings_duration_hours_check"
+
+Interval = Tuple[datetime, datetime, int]
+
+schedule_cache = TTLCache(AVAILABILITY_CACHE_SIZE, AVAILABILITY_CACHE_TTL)
+
+class BookingConflict(Exception):
+    pass
+
+class IntervalIndex:
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._intervals = sorted(intervals)
+        self._starts = [start for start, _, _ in self._intervals]
+        self._max_length = max((end - start for start, end, _ in self._intervals), default=timedelta(0))
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def overlapping(self, start: datetime, end: datetime, exclude_id: Optional[int] = None) -> List[Interval]:
+        lo = bisect.bisect_right(self._starts, start - self._max_length)
+        hi = bisect.bisect_left(self._starts, end)
+        return [interval for interval in self._intervals[lo:hi] if interval[1] > start and interval[2] != exclude_id]
+
+    def free(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        free = []
+        cursor = start
+        for busy_start, busy_end, _ in self.overlapping(start, end):
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if cursor < end:
+            free.append((cursor, end))
+        return free
+
+def plus_hours(dialect: str, value, hours):
+    if dialect == "sqlite":
+        return func.datetime(value, cast(hours, String) + literal(" hours"), type_=DateTime)
+    return value + func.make_interval(0, 0, 0, 0, hours)
+
+def overlaps(dialect: str, other, start, end, earliest_start):
+    return and_(
+        other.status.in_(BLOCKING_STATUSES),
+        other.booking_date.isnot(None),
+        other.booking_date < end,
+        other.booking_date > earliest_start,
+        plus_hours(dialect, other.booking_date, other.duration_hours) > start
+    )
+
+def conflict_clause(dialect: str, provider_id: int, start: datetime, duration_hours: int):
+    other = aliased(Booking)
+    end = start + timedelta(hours=duration_hours)
+    earliest_start = start - timedelta(hours=MAX_BOOKING_HOURS)
+    return exists().where(other.provider_id == provider_id, overlaps(dialect, other, start, end, earliest_start))
+
+def has_conflict(db: Session, provider_id: int, start: datetime, duration_hours: int) -> bool:
+    return db.query(conflict_clause(db.get_bind().dialect.name, provider_id, start, duration_hours)).scalar()
+
+def no_conflict_clause(dialect: str):
+    other = aliased(Booking)
+    return ~exists().where(
+        other.provider_id == Booking.provider_id,
+        other.id != Booking.id,
+        overlaps(
+            dialect,
+            other,
+            Booking.booking_date,
+            plus_hours(dialect, Booking.booking_date, Booking.duration_hours),
+            plus_hours(dialect, Booking.booking_date, -MAX_BOOKING_HOURS)
+        )
+    )
+
+def conflicting_pairs(dialect: str):
+    first, second = aliased(Booking), aliased(Booking)
+    return select(first.id, second.id).where(
+        first.status.in_(BLOCKING_STATUSES),
+        first.booking_date.isnot(None),
+        second.provider_id == first.provider_id,
+        second.id > first.id,
+        overlaps(
+            dialect,
+            second,
+            first.booking_date,
+            plus_hours(dialect, first.booking_date, first.duration_hours),
+            plus_hours(dialect, first.booking_date, -MAX_BOOKING_HOURS)
+        )
+    ).order_by(first.id, second.id)
+
+def find_conflicts(conn) -> List[Tuple[int, int]]:
+    return [(first, second) for first, second in conn.execute(conflicting_pairs(conn.dialect.name))]
+
+def find_booking_conflicts(db, rows: List[dict]) -> Set[int]:
+    blocking = [(index, row) for index, row in enumerate(rows) if row["status"] in BLOCKING_STATUSES and row.get("booking_date")]
+    if not blocking:
+        return set()
+    earliest = min(row["booking_date"] for _, row in blocking) - timedelta(hours=MAX_BOOKING_HOURS)
+    latest = max(row["booking_date"] + timedelta(hours=row["duration_hours"]) for _, row in blocking)
+    stored: Dict[int, List[Interval]] = defaultdict(list)
+    for row in db.execute(
+        select(Booking.provider_id, Booking.booking_date, Booking.duration_hours, Booking.id).where(
+            Booking.provider_id.in_({row["provider_id"] for _, row in blocking}),
+            Booking.status.in_(BLOCKING_STATUSES),
+            Booking.booking_date > earliest,
+            Booking.booking_date < latest
+        )
+    ):
+        stored[row.provider_id].append((row.booking_date, row.booking_date + timedelta(hours=row.duration_hours), row.id))
+
+    schedules = {provider_id: IntervalIndex(intervals) for provider_id, intervals in stored.items()}
+    added: Dict[int, List[Tuple[datetime, datetime]]] = defaultdict(list)
+    conflicts = set()
+    for index, row in blocking:
+        start = row["booking_date"]
+        end = start + timedelta(hours=row["duration_hours"])
+        schedule = schedules.get(row["provider_id"])
+        if (schedule is not None and schedule.overlapping(start, end)) or any(
+            other_start < end and other_end > start for other_start, other_end in added[row["provider_id"]]
+        ):
+            conflicts.add(index)
+        else:
+            added[row["provider_id"]].append((start, end))
+    return conflicts
+
+def invalid_durations(conn) -> List[int]:
+    return list(conn.execute(
+        select(Booking.id).where(or_(Booking.duration_hours < 1, Booking.duration_hours > MAX_BOOKING_HOURS)).order_by(Booking.id)
+    ).scalars())
+
+def has_duration_constraint(conn) -> bool:
+    if conn.dialect.name == "postgresql":
+        query = "SELECT 1 FROM pg_constraint WHERE conname = :name"
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name || '_insert'"
+    return conn.execute(text(query), {"name": DURATION_CONSTRAINT}).first() is not None
+
+def add_duration_constraint(conn) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            f"ALTER TABLE bookings ADD CONSTRAINT {DURATION_CONSTRAINT} CHECK (duration_hours BETWEEN 1 AND {MAX_BOOKING_HOURS})"
+        ))
+    elif conn.dialect.name == "sqlite":
+        for event, timing in (("insert", "INSERT"), ("update", "UPDATE OF duration_hours")):
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {DURATION_CONSTRAINT}_{event} BEFORE {timing} ON bookings "
+                f"WHEN NEW.duration_hours < 1 OR NEW.duration_hours > {MAX_BOOKING_HOURS} "
+                f"BEGIN SELECT RAISE(ABORT, '{DURATION_CONSTRAINT}'); END"
+            ))
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "pgcode", None) == "23P01" or OVERLAP_CONSTRAINT in str(error.orig)
+
+def _load(db: Session, provider_id: int, start: datetime, end: Optional[datetime] = None) -> IntervalIndex:
+    query = select(Booking.booking_date, Booking.duration_hours, Booking.id).where(
+        Booking.provider_id == provider_id,
+        Booking.status.in_(BLOCKING_STATUSES),
+        Booking.booking_date > start - timedelta(hours=MAX_BOOKING_HOURS)
+    )
+    if end is not None:
+        query = query.where(Booking.booking_date < end)
+    return IntervalIndex(
+        (row.booking_date, row.booking_date + timedelta(hours=row.duration_hours), row.id)
+        for row in db.execute(query)
+    )
+
+def provider_schedule(db: Session, provider_id: int, start: datetime, end: datetime) -> IntervalIndex:
+    cached = schedule_cache.get(provider_id)
+    if cached is not None and cached[0] <= start:
+        return cached[1]
+    now = datetime.utcnow()
+    if start < now:
+        return _load(db, provider_id, start, end)
+    index = _load(db, provider_id, now)
+    schedule_cache.set(provider_id, (now, index))
+    return index
+
+def free_intervals(db: Session, provider_id: int, start: datetime, end: datetime) -> Tuple[list, list]:
+    schedule = provider_schedule(db, provider_id, start, end)
+    busy = [(busy_start, busy_end) for busy_start, busy_end, _ in schedule.overlapping(start, end)]
+    return schedule.free(start, end), busy
+
+def invalidate(provider_id: int) -> None:
+    schedule_cache.pop(provider_id)
+
+def cache_stats() -> dict:
+    return schedule_cache.stats()
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare /skills throughput on the sync and async database paths")
+    parser.add_argument("--url", default="sqlite:///bench_async.db", help="Database URL to benchmark against (default: local SQLite file)")
+    parser.add_argument("--skills", type=int, default=5000, help="Number of skills to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--concurrency", default="10,50,200", help="Comma-separated concurrency levels")
+    parser.add_argument("--limit", type=int, default=50, help="Page size requested per call")
+    return parser.parse_args()
+
+def seed(engine, skills: int) -> None:
+    from sqlalchemy import func, insert, select
+    from database import Base
+    from models import Skill, User
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(Skill)).scalar()
+        if existing >= skills:
+            return
+        owners = max(1, skills // 10)
+        first_user = conn.execute(select(func.coalesce(func.max(User.id), 0))).scalar() + 1
+        conn.execute(insert(User), [
+            {"name": f"Bench User {i}", "email": f"bench{first_user + i}@example.com", "hashed_password": "x"}
+            for i in range(owners)
+        ])
+        conn.execute(insert(Skill), [
+            {"skill": f"Skill {i}", "description": f"Benchmark skill number {i}", "user_id": first_user + i % owners}
+            for i in range(skills - existing)
+        ])
+
+def build_app(limit: int):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+    import crud
+    import crud_async
+    from database import get_async_db, get_db
+
+    app = FastAPI()
+
+    @app.get("/sync/skills")
+    def sync_skills(after: int = 0, db: Session = Depends(get_db)):
+        return [skill.to_dict() for skill in crud.get_skills_page(db, limit=limit, after=after)]
+
+    @app.get("/async/skills")
+    async def async_skills(after: int = 0, db: AsyncSession = Depends(get_async_db)):
+        return [skill.to_dict() for skill in await crud_async.get_skills_page(db, limit=limit, after=after)]
+
+    return app
+
+async def drive(app, path: str, requests: int, concurrency: int, max_after: int) -> dict:
+    import httpx
+    from database import connect_async_engine
+
+    await connect_async_engine()
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, params={"after": random.randint(0, max_after)})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.url
+
+    from database import async_engine, engine
+
+    seed(engine, args.skills)
+    app = build_app(args.limit)
+
+    print(f"{'path':<8} {'conc':>5} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for label, path in (("sync", "/sync/skills"), ("async", "/async/skills")):
+            result = asyncio.run(drive(app, path, args.requests, concurrency, args.skills))
+            print(f"{label:<8} {concurrency:>5} {result['rps']:>10.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}")
+            asyncio.run(async_engine.dispose())
+
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
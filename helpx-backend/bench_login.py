@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure /login throughput, and /skills latency alongside it, under concurrent load")
+    parser.add_argument("--url", default="sqlite:///bench_login.db", help="Database URL to benchmark against (default: local SQLite file)")
+    parser.add_argument("--users", type=int, default=200, help="Number of users to seed")
+    parser.add_argument("--logins", type=int, default=400, help="Login requests per run")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent login requests")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost (BCRYPT_ROUNDS)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes (PASSWORD_HASH_WORKERS, 0 runs in threads)")
+    return parser.parse_args()
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)] * 1000 if values else 0.0
+
+def seed(engine, users: int) -> None:
+    from sqlalchemy import delete, insert
+    from models import User
+    from passwords import hash_password
+    import migrations
+
+    migrations.upgrade(engine)
+    hashed = hash_password("bench-password")
+    with engine.begin() as conn:
+        conn.execute(delete(User).where(User.email.like("login-bench-%")))
+        conn.execute(insert(User), [
+            {"name": f"Login Bench {i}", "email": f"login-bench-{i}@example.com", "hashed_password": hashed}
+            for i in range(users)
+        ])
+
+async def run(args) -> None:
+    import httpx
+    import main
+
+    login_latencies = []
+    skills_latencies = []
+    status_counts = {}
+    skills_failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with main.lifespan(main.app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/login", json={"email": f"login-bench-{i % args.users}@example.com", "password": "bench-password"})
+                login_latencies.append(time.perf_counter() - started)
+                status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+
+        async def browse(stop: asyncio.Event):
+            nonlocal skills_failures
+            while not stop.is_set():
+                started = time.perf_counter()
+                response = await client.get("/skills", params={"limit": 20})
+                skills_latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    skills_failures += 1
+                await asyncio.sleep(0.01)
+
+        stop = asyncio.Event()
+        browser = asyncio.create_task(browse(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await browser
+    login_failures = sum(count for code, count in status_counts.items() if code != 200)
+
+    print(f"bcrypt rounds {args.rounds}, hashing workers {args.workers}, concurrency {args.concurrency}")
+    print(f"logins/s        {(args.logins - login_failures) / elapsed:10.1f}")
+    print(f"login p50 ms    {statistics.median(login_latencies) * 1000:10.1f}")
+    print(f"login p95 ms    {percentile(login_latencies, 0.95):10.1f}")
+    print(f"skills p50 ms   {statistics.median(skills_latencies) * 1000 if skills_latencies else 0.0:10.1f}")
+    print(f"skills p95 ms   {percentile(skills_latencies, 0.95):10.1f}")
+    print(f"login failures  {login_failures:10d}")
+    print(f"skills failures {skills_failures:10d}")
+    print(f"status codes    {status_counts}")
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.url
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ.setdefault("FIREBASE_PREWARM", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("AUTH_MAX_CONCURRENT", str(args.concurrency))
+
+    from database import engine
+
+    seed(engine, args.users)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
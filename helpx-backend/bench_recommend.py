@@ -0,0 +1,53 @@
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time top-k similar-skill lookups against a synthetic recommendation index")
+    parser.add_argument("--skills", type=int, default=1000000, help="Skills to index")
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Distinct words in generated skill text")
+    parser.add_argument("--queries", type=int, default=500, help="Timed lookups")
+    parser.add_argument("--limit", type=int, default=10, help="Results per lookup")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+def make_skills(count: int, vocabulary: int, rng: random.Random):
+    words = [f"w{chr(97 + i % 26)}{chr(97 + i // 26 % 26)}{chr(97 + i // 676 % 26)}{chr(97 + i // 17576 % 26)}" for i in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    for skill_id in range(1, count + 1):
+        text = rng.choices(words, cum_weights=cumulative, k=rng.randint(8, 16))
+        yield {"id": skill_id, "skill": " ".join(text[:2]), "description": " ".join(text[2:]), "user_id": rng.randint(1, count // 5 + 1)}
+
+def main():
+    from recommend import SkillIndex, skill_terms, vectorize
+
+    args = parse_args()
+    rng = random.Random(args.seed)
+    index = SkillIndex()
+    index.start_building()
+
+    started = time.perf_counter()
+    index.load(make_skills(args.skills, args.vocabulary, rng))
+    print(f"built {index.size} skills, {len(index._postings)} terms in {time.perf_counter() - started:.1f}s")
+
+    boosts = {user_id: rng.randint(0, 50) for user_id in range(1, args.skills // 5 + 2)}
+    probes = list(make_skills(args.queries, args.vocabulary, rng))
+    runs = []
+    for probe in probes:
+        started = time.perf_counter()
+        index.query(vectorize(skill_terms(probe["skill"], probe["description"])), args.limit, exclude={probe["id"]}, boosts=boosts)
+        runs.append((time.perf_counter() - started) * 1000)
+    runs.sort()
+    print(f"query ms: p50 {statistics.median(runs):.2f} p95 {runs[int(len(runs) * 0.95)]:.2f} max {runs[-1]:.2f}")
+
+    adds = []
+    for offset, probe in enumerate(probes, start=1):
+        started = time.perf_counter()
+        index.add([dict(probe, id=args.skills + offset)])
+        adds.append((time.perf_counter() - started) * 1000)
+    print(f"incremental add ms: p50 {statistics.median(adds):.2f} max {max(adds):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import statistics
+import time
+
+QUERIES = {
+    "exact": ["guitar", "photography", "spanish tutoring", "bicycle repair"],
+    "misspelled": ["gutiar", "pyhton", "photgraphy", "carpnetry"],
+    "short": ["p", "gu", "sa"],
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time /skills/search ranking queries against a seeded skills table")
+    parser.add_argument("--url", default="sqlite:///bench_search.db", help="Throwaway database URL; its skills are replaced")
+    parser.add_argument("--skills", type=int, default=1000000, help="Skills to seed")
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Distinct filler words in descriptions")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per query")
+    parser.add_argument("--limit", type=int, default=20, help="Results per query")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the skills already in --url")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+def seed(engine, args) -> None:
+    from sqlalchemy import delete, insert
+
+    from loadtest import SKILL_LEVELS, SKILL_NAMES
+    from models import Skill, User
+    import migrations
+    import search
+
+    rng = random.Random(args.seed)
+    filler = [f"w{chr(97 + i % 26)}{chr(97 + i // 26 % 26)}{chr(97 + i // 676 % 26)}{chr(97 + i // 17576 % 26)}" for i in range(args.vocabulary)]
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(delete(Skill))
+        conn.execute(delete(User).where(User.email == "search-bench@example.com"))
+        user_id = conn.execute(insert(User).values(name="Search Bench", email="search-bench@example.com", hashed_password="x")).inserted_primary_key[0]
+        for start in range(1, args.skills + 1, 10000):
+            conn.execute(insert(Skill), [
+                {
+                    "id": i,
+                    "skill": f"{rng.choice(SKILL_NAMES)} {rng.choice(SKILL_LEVELS)}",
+                    "description": " ".join(rng.choices(filler, k=6) + [rng.choice(SKILL_NAMES).lower()]),
+                    "user_id": user_id,
+                }
+                for i in range(start, min(start + 10000, args.skills + 1))
+            ])
+    search.rebuild_index(engine)
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.url
+
+    from sqlalchemy.orm import Session
+    from database import engine
+    import search
+
+    if not args.skip_seed:
+        started = time.perf_counter()
+        seed(engine, args)
+        print(f"seeded {args.skills} skills in {time.perf_counter() - started:.1f}s")
+
+    with Session(engine) as db:
+        search.rank_skills(db, "warm up", args.limit)
+        for kind, queries in QUERIES.items():
+            runs = []
+            for q in queries:
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    search.rank_skills(db, q, args.limit)
+                    runs.append((time.perf_counter() - started) * 1000)
+            runs.sort()
+            print(f"{kind:11s} ms: p50 {statistics.median(runs):7.2f} p95 {runs[int(len(runs) * 0.95)]:7.2f} max {runs[-1]:7.2f}")
+
+if __name__ == "__main__":
+    main()
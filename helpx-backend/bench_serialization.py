@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare list serialization before and after typed response models with orjson")
+    parser.add_argument("--rows", default="100,1000,10000", help="Comma-separated list sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per list size")
+    return parser.parse_args()
+
+def make_bookings(rows: int) -> list:
+    from models import Booking, Skill, User
+
+    customer = User(id=1, name="Customer", email="customer@example.com")
+    provider = User(id=2, name="Provider", email="provider@example.com")
+    skill = Skill(id=1, skill="Guitar", user_id=2)
+    start = datetime(2030, 1, 1, 9, 30, 15, 123456)
+    return [
+        Booking(
+            id=i, customer_id=1, customer=customer, provider_id=2, provider=provider, skill_id=1, skill=skill,
+            status="pending", booking_date=start + timedelta(hours=i), duration_hours=1, notes=f"Booking {i}",
+            created_at=start, updated_at=start, version=1
+        )
+        for i in range(1, rows + 1)
+    ]
+
+def legacy_dict(booking) -> dict:
+    row = booking.to_dict()
+    for key in ("booking_date", "created_at", "updated_at"):
+        row[key] = row[key].isoformat() if row[key] else None
+    return row
+
+def page(rows: list) -> dict:
+    summary = {"pending": len(rows), "accepted": 0, "completed": 0, "cancelled": 0}
+    return {"success": True, "count": len(rows), "bookings": rows, "next_cursor": None, "summary": summary}
+
+async def before(bookings: list) -> bytes:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    content = await serialize_response(response_content=page([legacy_dict(booking) for booking in bookings]))
+    return JSONResponse(content).body
+
+async def after(bookings: list, field) -> bytes:
+    from fastapi.responses import ORJSONResponse
+    from fastapi.routing import serialize_response
+
+    content = await serialize_response(field=field, response_content=page([booking.to_dict() for booking in bookings]))
+    return ORJSONResponse(content).body
+
+def timed(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        asyncio.run(fn())
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs) * 1000
+
+def main():
+    import orjson
+    from fastapi.utils import create_response_field
+    import schemas
+
+    args = parse_args()
+    field = create_response_field(name="response", type_=schemas.BookingsPage)
+
+    print(f"{'rows':>7} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for rows in [int(n) for n in args.rows.split(",")]:
+        bookings = make_bookings(rows)
+        old, new = asyncio.run(before(bookings)), asyncio.run(after(bookings, field))
+        assert orjson.loads(old) == orjson.loads(new)
+        before_ms = timed(lambda: before(bookings), args.repeat)
+        after_ms = timed(lambda: after(bookings, field), args.repeat)
+        print(f"{rows:>7} {before_ms:>10.2f} {after_ms:>10.2f} {before_ms / after_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
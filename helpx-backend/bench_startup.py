@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time importing main, running its lifespan startup and serving the first request in fresh processes")
+    parser.add_argument("--url", default="sqlite:///bench_startup.db", help="Database URL the app starts against")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per configuration")
+    parser.add_argument("--path", default="/skills?limit=10", help="First request to serve")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+async def first_request(path: str) -> dict:
+    import httpx
+
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    async with main.lifespan(main.app):
+        ready = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            response = await client.get(path)
+        served = time.perf_counter()
+    response.raise_for_status()
+    return {
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "first_request_ms": (served - ready) * 1000,
+    }
+
+def measure(args, migrate: bool) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.url,
+        MIGRATE_ON_STARTUP=str(migrate).lower(),
+        FIREBASE_PREWARM="false",
+        RECOMMEND_PREWARM="false",
+        PASSWORD_HASH_WORKERS=os.getenv("PASSWORD_HASH_WORKERS", "0"),
+        LOG_LEVEL="WARNING",
+    )
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", "--path", args.path],
+            env=env, capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+def main():
+    args = parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(first_request(args.path))))
+        return
+
+    from sqlalchemy import create_engine
+    import migrations
+
+    engine = create_engine(args.url)
+    migrations.upgrade(engine)
+    engine.dispose()
+
+    print(f"{'MIGRATE_ON_STARTUP':>18} {'import ms':>10} {'startup ms':>11} {'first request ms':>17}")
+    for migrate in (True, False):
+        result = measure(args, migrate)
+        print(f"{str(migrate).lower():>18} {result['import_ms']:>10.1f} {result['startup_ms']:>11.1f} {result['first_request_ms']:>17.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select, update
+
+CHECKPOINTS = Table(
+    "import_checkpoints",
+    MetaData(),
+    Column("source", String(500), primary_key=True),
+    Column("position", Integer, nullable=False),
+    Column("imported", Integer, nullable=False),
+    Column("rejected", Integer, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk load users, skills or bookings from CSV or JSONL")
+    parser.add_argument("kind", choices=["users", "skills", "bookings"], help="What the file contains")
+    parser.add_argument("path", help="CSV (with a header row) or JSONL file; '-' reads JSONL from stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Input format (default: from the file extension)")
+    parser.add_argument("--url", default=None, help="Database URL (default: DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert and checkpoint")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes hashing plain-text passwords")
+    parser.add_argument("--restart", action="store_true", help="Ignore a saved checkpoint and start from the first row")
+    parser.add_argument("--rejects", default=None, help="Append rejected rows, with the reason, to this JSONL file")
+    return parser.parse_args()
+
+def _clean(record: dict) -> dict:
+    return {key.strip(): (value.strip() or None) if isinstance(value, str) else value for key, value in record.items() if key}
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    if path == "-":
+        for line in sys.stdin:
+            if line.strip():
+                yield _clean(json.loads(line))
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for record in csv.DictReader(f):
+                yield _clean(record)
+        else:
+            for line in f:
+                if line.strip():
+                    yield _clean(json.loads(line))
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _parse_int(value) -> Optional[int]:
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+def _user_ids(conn, emails) -> Dict[str, int]:
+    from models import User
+
+    emails = {email for email in emails if email}
+    if not emails:
+        return {}
+    return {row.email: row.id for row in conn.execute(select(User.id, User.email).where(User.email.in_(emails)))}
+
+class Importer:
+    def __init__(self, engine, kind: str, workers: int):
+        from models import User, Skill, Booking
+
+        self.engine = engine
+        self.kind = kind
+        self.table = {"users": User, "skills": Skill, "bookings": Booking}[kind].__table__
+        self.conflict_column = "email" if kind == "users" else None
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def _hash_all(self, plain: List[str]) -> List[str]:
+        from passwords import hash_password
+
+        if self.workers <= 1 or len(plain) < 2:
+            return [hash_password(password) for password in plain]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._executor.map(hash_password, plain, chunksize=max(1, len(plain) // (self.workers * 4))))
+
+    def prepare(self, conn, records: List[dict]) -> Tuple[List[dict], List[Tuple[dict, str]]]:
+        return getattr(self, f"_prepare_{self.kind}")(conn, records)
+
+    def _prepare_users(self, conn, records):
+        rows, rejects, plain = [], [], []
+        for record in records:
+            if not record.get("name") or not record.get("email"):
+                rejects.append((record, "name and email are required"))
+            elif not record.get("hashed_password") and not record.get("password"):
+                rejects.append((record, "password or hashed_password is required"))
+            else:
+                rows.append({
+                    "name": record["name"],
+                    "email": record["email"],
+                    "hashed_password": record.get("hashed_password"),
+                    "bio": record.get("bio"),
+                })
+                if not record.get("hashed_password"):
+                    plain.append((len(rows) - 1, record["password"]))
+        for (index, _), hashed in zip(plain, self._hash_all([password for _, password in plain])):
+            rows[index]["hashed_password"] = hashed
+        return rows, rejects
+
+    def _prepare_skills(self, conn, records):
+        users = _user_ids(conn, (record.get("user_email") for record in records))
+        rows, rejects = [], []
+        for record in records:
+            user_id = users.get(record.get("user_email"))
+            if not record.get("skill"):
+                rejects.append((record, "skill is required"))
+            elif user_id is None:
+                rejects.append((record, "unknown user_email"))
+            else:
+                rows.append({"skill": record["skill"], "description": record.get("description"), "user_id": user_id})
+        return rows, rejects
+
+    def _prepare_bookings(self, conn, records):
+        import availability
+        from models import BookingStatus, Skill
+
+        users = _user_ids(conn, itertools.chain.from_iterable(
+            (record.get("customer_email"), record.get("provider_email")) for record in records
+        ))
+        skill_ids = {_parse_int(record["skill_id"]) for record in records if record.get("skill_id")} - {None}
+        owners = {row.id: row.user_id for row in conn.execute(select(Skill.id, Skill.user_id).where(Skill.id.in_(skill_ids)))} if skill_ids else {}
+        providers = {users[record["provider_email"]] for record in records if not record.get("skill_id") and record.get("provider_email") in users}
+        by_name: Dict[Tuple[int, str], int] = {}
+        if providers:
+            for row in conn.execute(select(Skill.id, Skill.user_id, Skill.skill).where(Skill.user_id.in_(providers)).order_by(Skill.id)):
+                by_name.setdefault((row.user_id, row.skill.lower()), row.id)
+
+        statuses = {status.value for status in BookingStatus}
+        now = datetime.utcnow()
+        rows, sources, rejects = [], [], []
+        for record in records:
+            customer_id = users.get(record.get("customer_email"))
+            provider_id = users.get(record.get("provider_email"))
+            if record.get("skill_id"):
+                skill_id = _parse_int(record["skill_id"])
+                provider_id = provider_id or owners.get(skill_id)
+                reason = "skill_id must be an integer" if skill_id is None else "unknown skill_id" if skill_id not in owners else "skill_id does not belong to the provider" if owners[skill_id] != provider_id else None
+            else:
+                skill_id = by_name.get((provider_id, (record.get("skill") or "").lower()))
+                reason = "skill not found for the provider" if skill_id is None else None
+            status = record.get("status") or "pending"
+            duration_hours = _parse_int(record["duration_hours"]) if record.get("duration_hours") not in (None, "") else 1
+            if customer_id is None:
+                reason = "unknown customer_email"
+            elif provider_id is None:
+                reason = "unknown provider_email"
+            elif status not in statuses:
+                reason = f"status must be one of {', '.join(sorted(statuses))}"
+            elif duration_hours is None or not 1 <= duration_hours <= availability.MAX_BOOKING_HOURS:
+                reason = f"duration_hours must be a whole number from 1 to {availability.MAX_BOOKING_HOURS}"
+            if reason:
+                rejects.append((record, reason))
+                continue
+            try:
+                booking_date = _parse_datetime(record.get("booking_date"))
+            except ValueError:
+                rejects.append((record, "booking_date is not an ISO 8601 date"))
+                continue
+            try:
+                created_at = _parse_datetime(record.get("created_at")) or now
+            except ValueError:
+                rejects.append((record, "created_at is not an ISO 8601 date"))
+                continue
+            rows.append({
+                "customer_id": customer_id,
+                "provider_id": provider_id,
+                "skill_id": skill_id,
+                "status": status,
+                "booking_date": booking_date,
+                "duration_hours": duration_hours,
+                "notes": record.get("notes"),
+                "created_at": created_at,
+                "updated_at": now,
+            })
+            sources.append(record)
+        conflicts = availability.find_booking_conflicts(conn, rows)
+        rejects.extend((sources[index], "overlaps another accepted or completed booking of the provider") for index in sorted(conflicts))
+        return [row for index, row in enumerate(rows) if index not in conflicts], rejects
+
+    def write(self, conn, rows: List[dict]) -> int:
+        if not rows:
+            return 0
+        if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+            return self._copy(conn, rows)
+        statement = insert(self.table)
+        if self.conflict_column and conn.dialect.name in ("postgresql", "sqlite"):
+            if conn.dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            statement = dialect_insert(self.table).on_conflict_do_nothing(index_elements=[self.conflict_column])
+        result = conn.execute(statement, rows)
+        return result.rowcount if result.rowcount >= 0 else len(rows)
+
+    def _copy(self, conn, rows: List[dict]) -> int:
+        columns = ", ".join(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row.values()])
+        buffer.seek(0)
+
+        cursor = conn.connection.driver_connection.cursor()
+        if self.conflict_column is None:
+            cursor.copy_expert(f"COPY {self.table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            return len(rows)
+        staging = f"import_{self.table.name}"
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS AS SELECT {columns} FROM {self.table.name} WITH NO DATA")
+        cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            f"INSERT INTO {self.table.name} ({columns}) SELECT {columns} FROM {staging} "
+            f"ON CONFLICT ({self.conflict_column}) DO NOTHING"
+        )
+        return cursor.rowcount
+
+def load_checkpoint(conn, source: str) -> Tuple[int, int, int]:
+    row = conn.execute(select(CHECKPOINTS).where(CHECKPOINTS.c.source == source)).first()
+    return (row.position, row.imported, row.rejected) if row else (0, 0, 0)
+
+def save_checkpoint(conn, source: str, position: int, imported: int, rejected: int) -> None:
+    values = {"position": position, "imported": imported, "rejected": rejected, "updated_at": func.now()}
+    if conn.execute(update(CHECKPOINTS).where(CHECKPOINTS.c.source == source).values(**values)).rowcount == 0:
+        conn.execute(insert(CHECKPOINTS).values(source=source, **values))
+
+def run(args) -> None:
+    from database import engine
+    import migrations
+    import response_cache
+    import search
+    import stats
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    source = f"{args.kind}:{os.path.abspath(args.path) if args.path != '-' else 'stdin'}"
+    migrations.upgrade(engine)
+    CHECKPOINTS.create(bind=engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        if args.restart:
+            conn.execute(CHECKPOINTS.delete().where(CHECKPOINTS.c.source == source))
+        position, imported, rejected = load_checkpoint(conn, source)
+    if position:
+        print(f"resuming {source} after row {position} ({imported} imported, {rejected} rejected so far)", file=sys.stderr)
+
+    importer = Importer(engine, args.kind, args.workers)
+    rejects_file = open(args.rejects, "a", encoding="utf-8") if args.rejects else None
+    records = itertools.islice(read_records(args.path, fmt), position, None)
+    started = time.perf_counter()
+    run_rows = 0
+    try:
+        while True:
+            batch = list(itertools.islice(records, args.batch_size))
+            if not batch:
+                break
+            with engine.begin() as conn:
+                rows, batch_rejects = importer.prepare(conn, batch)
+                written = importer.write(conn, rows)
+                position += len(batch)
+                imported += written
+                rejected += len(batch_rejects) + len(rows) - written
+                save_checkpoint(conn, source, position, imported, rejected)
+            if written:
+                response_cache.bump(engine, args.kind)
+            if rejects_file:
+                for record, reason in batch_rejects:
+                    rejects_file.write(json.dumps({"row": record, "reason": reason}, default=str) + "\n")
+                rejects_file.flush()
+            run_rows += len(batch)
+            elapsed = time.perf_counter() - started
+            print(f"{args.kind}: {position} rows read, {imported} imported, {rejected} rejected, {run_rows / elapsed:.0f} rows/s", file=sys.stderr)
+    finally:
+        importer.close()
+        if rejects_file:
+            rejects_file.close()
+
+    if args.kind == "skills" and run_rows:
+        search.rebuild_index(engine)
+    if args.kind == "bookings" and run_rows:
+        with engine.begin() as conn:
+            stats.rebuild(conn)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "source": source,
+        "rows": position,
+        "imported": imported,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(run_rows / elapsed, 1) if elapsed else 0.0,
+    }))
+
+def main():
+    args = parse_args()
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    run(args)
+
+if __name__ == "__main__":
+    main()
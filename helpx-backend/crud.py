@@ -1,38 +1,151 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, func, insert, literal, or_, select, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, Query, aliased, joinedload
 from models import User, Skill, Booking
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
-from auth import get_password_hash
+from auth import get_password_hash, invalidate_user
+import availability
+import recommend
+import response_cache
+import search
+import stats
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 500
+
+BOOKING_STATUSES = ("pending", "accepted", "completed", "cancelled")
+BOOKING_SORTS = ("id", "booking_date", "created_at")
+
+BookingCursor = Union[int, Tuple[datetime, int]]
+BOOKING_TRANSITIONS = {
+    "accepted": ("pending",),
+    "completed": ("accepted",),
+    "cancelled": ("pending", "accepted", "completed"),
+}
+
+class BookingNotFound(Exception):
+    pass
+
+class BookingForbidden(Exception):
+    pass
+
+def _skill_query(db: Session) -> Query:
+    return db.query(Skill).options(joinedload(Skill.owner).load_only(User.id, User.name))
+
+def _booking_query(db: Session) -> Query:
+    return db.query(Booking).options(
+        joinedload(Booking.customer).load_only(User.id, User.name),
+        joinedload(Booking.provider).load_only(User.id, User.name),
+        joinedload(Booking.skill).load_only(Skill.id, Skill.skill)
+    )
+
+def _in_order(query: Query, ids: List[int]) -> list:
+    entity = query.column_descriptions[0]["entity"]
+    rows = {row.id: row for row in query.filter(entity.id.in_(ids))}
+    return [rows[row_id] for row_id in ids]
+
+def _keyset(query: Query, after: Optional[int], limit: Optional[int]) -> Query:
+    entity = query.column_descriptions[0]["entity"]
+    if after is not None:
+        query = query.filter(entity.id > after)
+    query = query.order_by(entity.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
 
 def get_all_users(db: Session) -> List[User]:
     return db.query(User).all()
 
+def get_users_page(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> List[User]:
+    return _keyset(db.query(User), after, limit).all()
+
+def iter_users(db: Session, after: Optional[int] = None) -> Iterator[User]:
+    return _keyset(db.query(User), after, None).yield_per(STREAM_BATCH_SIZE)
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
+def get_users_by_ids(db: Session, user_ids: Iterable[int]) -> Dict[int, User]:
+    return {user.id: user for user in db.query(User).filter(User.id.in_(set(user_ids)))}
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, name: str, email: str, password: str, bio: str = None) -> User:
-    hashed_password = get_password_hash(password)
+def create_user(db: Session, name: str, email: str, password: str = None, bio: str = None, hashed_password: str = None) -> User:
+    if hashed_password is None:
+        hashed_password = get_password_hash(password)
     db_user = User(name=name, email=email, hashed_password=hashed_password, bio=bio)
     db.add(db_user)
     db.commit()
+    response_cache.bump(db, "users")
     db.refresh(db_user)
+    invalidate_user(db_user.id)
     return db_user
 
 def get_all_skills(db: Session) -> List[Skill]:
-    return db.query(Skill).all()
+    return _skill_query(db).all()
+
+def get_skill_by_id(db: Session, skill_id: int) -> Optional[Skill]:
+    return _skill_query(db).filter(Skill.id == skill_id).first()
+
+def search_skills(db: Session, q: str, limit: int = search.DEFAULT_SEARCH_LIMIT) -> List[Tuple[Skill, float]]:
+    return _ranked_skills(db, search.rank_skills(db, q, limit))
+
+def _ranked_skills(db: Session, ranked: List[Tuple[int, float]]) -> List[Tuple[Skill, float]]:
+    if not ranked:
+        return []
+    skills = {skill.id: skill for skill in _skill_query(db).filter(Skill.id.in_([skill_id for skill_id, _ in ranked]))}
+    return [(skills[skill_id], score) for skill_id, score in ranked if skill_id in skills]
+
+def get_similar_skills(db: Session, skill_id: int, limit: int = recommend.DEFAULT_RECOMMEND_LIMIT) -> Optional[List[Tuple[Skill, float]]]:
+    skill = db.get(Skill, skill_id)
+    if skill is None:
+        return None
+    return _ranked_skills(db, recommend.similar_skills(db, skill, limit))
+
+def get_recommendations(db: Session, user_id: int, limit: int = recommend.DEFAULT_RECOMMEND_LIMIT) -> List[Tuple[Skill, float]]:
+    return _ranked_skills(db, recommend.recommend_for_user(db, user_id, limit))
+
+def _skills_query(db: Session, user_id: Optional[int] = None) -> Query:
+    query = _skill_query(db)
+    if user_id is not None:
+        query = query.filter(Skill.user_id == user_id)
+    return query
+
+def get_skills_page(db: Session, user_id: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> List[Skill]:
+    return _keyset(_skills_query(db, user_id), after, limit).all()
+
+def iter_skills(db: Session, user_id: Optional[int] = None, after: Optional[int] = None) -> Iterator[Skill]:
+    return _keyset(_skills_query(db, user_id), after, None).yield_per(STREAM_BATCH_SIZE)
 
 def get_skills_by_user(db: Session, user_id: int) -> List[Skill]:
-    return db.query(Skill).filter(Skill.user_id == user_id).all()
+    return _skill_query(db).filter(Skill.user_id == user_id).all()
 
 def create_skill(db: Session, skill: str, description: str, user_id: int) -> Skill:
     db_skill = Skill(skill=skill, description=description, user_id=user_id)
     db.add(db_skill)
+    db.flush()
+    search.index_skill(db, db_skill)
     db.commit()
-    db.refresh(db_skill)
-    return db_skill
+    response_cache.bump(db, "skills")
+    recommend.add_skills([{"id": db_skill.id, "skill": skill, "description": description, "user_id": user_id}])
+    return get_skill_by_id(db, db_skill.id)
+
+def create_skills(db: Session, user_id: int, skills: List[dict]) -> List[Skill]:
+    rows = [{"skill": item["skill"], "description": item.get("description"), "user_id": user_id} for item in skills]
+    ids = list(db.scalars(insert(Skill).returning(Skill.id, sort_by_parameter_order=True), rows))
+    indexed = [dict(row, id=skill_id) for row, skill_id in zip(rows, ids)]
+    search.index_skills(db, indexed)
+    db.commit()
+    response_cache.bump(db, "skills")
+    recommend.add_skills(indexed)
+    return _in_order(_skill_query(db), ids)
+
+def get_skills_by_ids(db: Session, skill_ids: Iterable[int]) -> Dict[int, Skill]:
+    return {skill.id: skill for skill in db.query(Skill).filter(Skill.id.in_(set(skill_ids)))}
 
 def create_booking(
     db: Session,
@@ -43,45 +156,274 @@ def create_booking(
     duration_hours: int = 1,
     notes: Optional[str] = None
 ) -> Booking:
-    db_booking = Booking(
-        customer_id=customer_id,
-        provider_id=provider_id,
-        skill_id=skill_id,
-        booking_date=booking_date,
-        duration_hours=duration_hours,
-        notes=notes,
-        status="pending"
-    )
-    db.add(db_booking)
+    now = datetime.utcnow()
+    row = {
+        "customer_id": customer_id,
+        "provider_id": provider_id,
+        "skill_id": skill_id,
+        "booking_date": booking_date,
+        "duration_hours": duration_hours,
+        "notes": notes,
+        "status": "pending",
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    }
+    values = select(*(literal(value, Booking.__table__.c[name].type) for name, value in row.items()))
+    if booking_date is not None:
+        values = values.where(~availability.conflict_clause(db.get_bind().dialect.name, provider_id, booking_date, duration_hours))
+    booking_id = db.execute(insert(Booking).from_select(list(row), values).returning(Booking.id)).scalar()
+    if booking_id is None:
+        db.rollback()
+        raise availability.BookingConflict("The provider already has a booking at that time")
+    stats.record(db, [stats.BookingChange(provider_id, skill_id, duration_hours, None, "pending")])
+    db.commit()
+    return get_booking_by_id(db, booking_id)
+
+def create_bookings(db: Session, customer_id: int, bookings: List[dict]) -> List[Booking]:
+    rows = [
+        {
+            "customer_id": customer_id,
+            "provider_id": item["provider_id"],
+            "skill_id": item["skill_id"],
+            "booking_date": item.get("booking_date"),
+            "duration_hours": item.get("duration_hours", 1),
+            "notes": item.get("notes"),
+            "status": "pending"
+        }
+        for item in bookings
+    ]
+    ids = list(db.scalars(insert(Booking).returning(Booking.id, sort_by_parameter_order=True), rows))
+    stats.record(db, [stats.BookingChange(row["provider_id"], row["skill_id"], row["duration_hours"], None, "pending") for row in rows])
     db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    return _in_order(_booking_query(db), ids)
+
+def find_booking_conflicts(db: Session, bookings: List[dict]) -> List[bool]:
+    return [
+        item.get("booking_date") is not None
+        and availability.has_conflict(db, item["provider_id"], item["booking_date"], item.get("duration_hours", 1))
+        for item in bookings
+    ]
 
 def get_booking_by_id(db: Session, booking_id: int) -> Optional[Booking]:
-    return db.query(Booking).filter(Booking.id == booking_id).first()
+    return _booking_query(db).filter(Booking.id == booking_id).first()
 
 def get_bookings_by_customer(db: Session, customer_id: int) -> List[Booking]:
-    return db.query(Booking).filter(Booking.customer_id == customer_id).all()
+    return _booking_query(db).filter(Booking.customer_id == customer_id).all()
 
 def get_bookings_by_provider(db: Session, provider_id: int) -> List[Booking]:
-    return db.query(Booking).filter(Booking.provider_id == provider_id).all()
+    return _booking_query(db).filter(Booking.provider_id == provider_id).all()
+
+def _booking_sort_key(sort: str):
+    return {"id": Booking.id, "booking_date": Booking.scheduled_at, "created_at": Booking.created_at}[sort]
+
+def _booking_order(sort: str, descending: bool) -> list:
+    columns = [Booking.id] if sort == "id" else [_booking_sort_key(sort), Booking.id]
+    return [column.desc() if descending else column.asc() for column in columns]
+
+def _booking_filters(
+    statuses: Optional[List[str]],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    sort: str = "id",
+    descending: bool = False,
+    after: Optional[BookingCursor] = None
+) -> list:
+    filters = []
+    if statuses:
+        filters.append(Booking.status.in_(statuses))
+    if start is not None:
+        filters.append(Booking.scheduled_at >= start)
+    if end is not None:
+        filters.append(Booking.scheduled_at < end)
+    if after is not None:
+        if sort == "id":
+            filters.append(Booking.id < after if descending else Booking.id > after)
+        else:
+            position = tuple_(_booking_sort_key(sort), Booking.id)
+            cursor = tuple_(literal(after[0], DateTime), literal(after[1]))
+            filters.append(position < cursor if descending else position > cursor)
+    return filters
+
+def _booking_roles(user_id: int, as_customer: bool, as_provider: bool) -> list:
+    if as_customer:
+        return [(Booking.customer_id == user_id,)]
+    if as_provider:
+        return [(Booking.provider_id == user_id,)]
+    return [(Booking.customer_id == user_id,), (Booking.provider_id == user_id, Booking.customer_id != user_id)]
+
+def _bookings_for_user_query(
+    db: Session,
+    user_id: int,
+    as_customer: bool = False,
+    as_provider: bool = False,
+    statuses: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: str = "id",
+    descending: bool = False,
+    after: Optional[BookingCursor] = None,
+    limit: Optional[int] = None
+) -> Query:
+    filters = _booking_filters(statuses, start, end, sort, descending, after)
+    order = _booking_order(sort, descending)
+    roles = _booking_roles(user_id, as_customer, as_provider)
+    query = _booking_query(db)
+    if len(roles) == 1:
+        query = query.filter(*roles[0], *filters)
+    else:
+        branches = []
+        for role in roles:
+            branch = select(Booking.id).where(*role, *filters).order_by(*order).limit(limit).subquery()
+            branches.append(select(branch.c.id))
+        query = query.filter(Booking.id.in_(union_all(*branches)))
+    return query.order_by(*order).limit(limit)
+
+def get_bookings_page(
+    db: Session,
+    user_id: int,
+    as_customer: bool = False,
+    as_provider: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[BookingCursor] = None,
+    statuses: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: str = "id",
+    descending: bool = False
+) -> List[Booking]:
+    return _bookings_for_user_query(db, user_id, as_customer, as_provider, statuses, start, end, sort, descending, after, limit).all()
+
+def iter_bookings(
+    db: Session,
+    user_id: int,
+    as_customer: bool = False,
+    as_provider: bool = False,
+    after: Optional[BookingCursor] = None,
+    statuses: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: str = "id",
+    descending: bool = False
+) -> Iterator[Booking]:
+    return _bookings_for_user_query(db, user_id, as_customer, as_provider, statuses, start, end, sort, descending, after).yield_per(STREAM_BATCH_SIZE)
+
+def count_bookings_by_status(
+    db: Session,
+    user_id: int,
+    as_customer: bool = False,
+    as_provider: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[str, int]:
+    filters = _booking_filters(None, start, end)
+    branches = [
+        select(Booking.status, func.count().label("count")).where(*role, *filters).group_by(Booking.status)
+        for role in _booking_roles(user_id, as_customer, as_provider)
+    ]
+    counts = dict.fromkeys(BOOKING_STATUSES, 0)
+    for row in db.execute(union_all(*branches) if len(branches) > 1 else branches[0]):
+        counts[row.status] = counts.get(row.status, 0) + row.count
+    return counts
+
+def get_provider_stats(db: Session, provider_id: int) -> dict:
+    return stats.provider_stats(db, provider_id)
+
+def get_top_skills(db: Session, limit: int = stats.DEFAULT_TOP_SKILLS) -> List[dict]:
+    return stats.top_skills(db, limit)
+
+def get_provider_availability(db: Session, provider_id: int, start: datetime, end: datetime) -> Tuple[list, list]:
+    return availability.free_intervals(db, provider_id, start, end)
 
 def get_all_bookings(db: Session) -> List[Booking]:
-    return db.query(Booking).all()
+    return _booking_query(db).all()
 
-def update_booking_status(db: Session, booking_id: int, status: str) -> Optional[Booking]:
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if booking:
-        booking.status = status
-        booking.updated_at = datetime.utcnow()
+def _booking_returning():
+    customer = aliased(User)
+    provider = aliased(User)
+    skill = aliased(Skill)
+    return (
+        *Booking.__table__.c,
+        select(customer.name).where(customer.id == Booking.customer_id).scalar_subquery().label("customer_name"),
+        select(provider.name).where(provider.id == Booking.provider_id).scalar_subquery().label("provider_name"),
+        select(skill.skill).where(skill.id == Booking.skill_id).scalar_subquery().label("skill_name"),
+    )
+
+def booking_row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "customer_id": row.customer_id,
+        "customer_name": row.customer_name,
+        "provider_id": row.provider_id,
+        "provider_name": row.provider_name,
+        "skill_id": row.skill_id,
+        "skill_name": row.skill_name,
+        "status": row.status,
+        "booking_date": row.booking_date,
+        "duration_hours": row.duration_hours,
+        "notes": row.notes,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "version": row.version
+    }
+
+def transition_booking(
+    db: Session,
+    booking_id: int,
+    status: str,
+    user_id: int,
+    provider_only: bool = True,
+    expected_version: Optional[int] = None
+) -> dict:
+    sources = BOOKING_TRANSITIONS[status]
+    actor = Booking.provider_id == user_id if provider_only else or_(Booking.customer_id == user_id, Booking.provider_id == user_id)
+    statement = (
+        update(Booking)
+        .where(Booking.id == booking_id, Booking.status.in_(sources), actor)
+        .values(status=status, previous_status=Booking.status, updated_at=datetime.utcnow(), version=Booking.version + 1)
+        .returning(*_booking_returning())
+        .execution_options(synchronize_session=False)
+    )
+    if expected_version is not None:
+        statement = statement.where(Booking.version == expected_version)
+    if status in availability.BLOCKING_STATUSES:
+        statement = statement.where(availability.no_conflict_clause(db.get_bind().dialect.name))
+
+    try:
+        row = db.execute(statement).first()
+        if row is not None:
+            stats.record(db, [stats.BookingChange(row.provider_id, row.skill_id, row.duration_hours, row.previous_status, row.status)])
         db.commit()
-        db.refresh(booking)
-    return booking
+    except IntegrityError as e:
+        db.rollback()
+        if availability.is_overlap_violation(e):
+            raise availability.BookingConflict("The provider already has a booking at that time") from e
+        raise
+
+    if row is not None:
+        availability.invalidate(row.provider_id)
+        return booking_row_to_dict(row)
+
+    current = db.execute(
+        select(Booking.customer_id, Booking.provider_id, Booking.status, Booking.version).where(Booking.id == booking_id)
+    ).first()
+    db.rollback()
+    if current is None:
+        raise BookingNotFound("Booking not found")
+    if current.provider_id != user_id and (provider_only or current.customer_id != user_id):
+        raise BookingForbidden("Not authorized to update this booking")
+    if expected_version is not None and current.version != expected_version:
+        raise availability.BookingConflict(f"Booking was modified concurrently (current version {current.version})")
+    if current.status not in sources:
+        raise availability.BookingConflict(f"Cannot change booking status from {current.status} to {status}")
+    raise availability.BookingConflict("The provider already has a booking at that time")
 
 def delete_booking(db: Session, booking_id: int) -> bool:
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if booking:
         db.delete(booking)
+        stats.record(db, [stats.BookingChange(booking.provider_id, booking.skill_id, booking.duration_hours, booking.status, None)])
         db.commit()
+        availability.invalidate(booking.provider_id)
         return True
     return False
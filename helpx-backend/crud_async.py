@@ -0,0 +1,78 @@
+import functools
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+import crud
+from auth import get_password_hash_async
+from models import Booking, Skill, User
+
+def _run_sync(fn):
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+get_all_users = _run_sync(crud.get_all_users)
+get_users_page = _run_sync(crud.get_users_page)
+get_user_by_id = _run_sync(crud.get_user_by_id)
+get_user_by_email = _run_sync(crud.get_user_by_email)
+get_users_by_ids = _run_sync(crud.get_users_by_ids)
+get_all_skills = _run_sync(crud.get_all_skills)
+get_skill_by_id = _run_sync(crud.get_skill_by_id)
+get_skills_by_ids = _run_sync(crud.get_skills_by_ids)
+search_skills = _run_sync(crud.search_skills)
+get_similar_skills = _run_sync(crud.get_similar_skills)
+get_recommendations = _run_sync(crud.get_recommendations)
+get_skills_page = _run_sync(crud.get_skills_page)
+get_skills_by_user = _run_sync(crud.get_skills_by_user)
+create_skill = _run_sync(crud.create_skill)
+create_skills = _run_sync(crud.create_skills)
+create_booking = _run_sync(crud.create_booking)
+create_bookings = _run_sync(crud.create_bookings)
+find_booking_conflicts = _run_sync(crud.find_booking_conflicts)
+get_booking_by_id = _run_sync(crud.get_booking_by_id)
+get_bookings_by_customer = _run_sync(crud.get_bookings_by_customer)
+get_bookings_by_provider = _run_sync(crud.get_bookings_by_provider)
+get_bookings_page = _run_sync(crud.get_bookings_page)
+count_bookings_by_status = _run_sync(crud.count_bookings_by_status)
+get_provider_stats = _run_sync(crud.get_provider_stats)
+get_top_skills = _run_sync(crud.get_top_skills)
+get_all_bookings = _run_sync(crud.get_all_bookings)
+get_provider_availability = _run_sync(crud.get_provider_availability)
+transition_booking = _run_sync(crud.transition_booking)
+delete_booking = _run_sync(crud.delete_booking)
+
+async def create_user(db: AsyncSession, name: str, email: str, password: str = None, bio: str = None, hashed_password: str = None) -> User:
+    if hashed_password is None:
+        hashed_password = await get_password_hash_async(password)
+    return await db.run_sync(crud.create_user, name, email, bio=bio, hashed_password=hashed_password)
+
+async def _stream(db: AsyncSession, query: Query) -> AsyncIterator:
+    result = await db.stream_scalars(query.statement.execution_options(yield_per=crud.STREAM_BATCH_SIZE))
+    async for row in result:
+        yield row
+
+def iter_users(db: AsyncSession, after: Optional[int] = None) -> AsyncIterator[User]:
+    return _stream(db, crud._keyset(db.sync_session.query(User), after, None))
+
+def iter_skills(db: AsyncSession, user_id: Optional[int] = None, after: Optional[int] = None) -> AsyncIterator[Skill]:
+    return _stream(db, crud._keyset(crud._skills_query(db.sync_session, user_id), after, None))
+
+def iter_bookings(
+    db: AsyncSession,
+    user_id: int,
+    as_customer: bool = False,
+    as_provider: bool = False,
+    after: Optional[crud.BookingCursor] = None,
+    statuses: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort: str = "id",
+    descending: bool = False
+) -> AsyncIterator[Booking]:
+    return _stream(db, crud._bookings_for_user_query(
+        db.sync_session, user_id, as_customer, as_provider, statuses, start, end, sort, descending, after
+    ))
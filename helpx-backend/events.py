@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Set
+
+import orjson
+from sqlalchemy.engine import make_url
+
+from database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "postgres" if make_url(DATABASE_URL).get_backend_name() == "postgresql" else "memory")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "helpx_events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_RECONNECT_SECONDS = float(os.getenv("EVENTS_RECONNECT_SECONDS", "2"))
+EVENTS_AUTH_TIMEOUT = float(os.getenv("EVENTS_AUTH_TIMEOUT", "10"))
+NOTIFY_MAX_BYTES = 7900
+
+RESYNC = orjson.dumps({"type": "resync"}).decode()
+SUBSCRIBED = orjson.dumps({"type": "subscribed"}).decode()
+
+class Broker(ABC):
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self.delivered = 0
+        self.overflows = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def deliver(self, user_ids: Iterable[int], message: str) -> None:
+        for user_id in set(user_ids):
+            for queue in self._subscribers.get(user_id, ()):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self.overflows += 1
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(RESYNC)
+                else:
+                    self.delivered += 1
+
+    @abstractmethod
+    async def publish(self, user_ids: Iterable[int], message: str) -> None:
+        ...
+
+class MemoryBroker(Broker):
+    async def publish(self, user_ids: Iterable[int], message: str) -> None:
+        self.deliver(user_ids, message)
+
+class PostgresBroker(Broker):
+    def __init__(self, dsn: str, channel: str = EVENTS_CHANNEL):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._reconnect: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        await self._connect()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.channel, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._conn = conn
+        logger.info("Listening for events", extra={"event": "events.listen", "channel": self.channel})
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        envelope = orjson.loads(payload)
+        self.deliver(envelope["users"], envelope["message"])
+
+    def _on_terminated(self, conn) -> None:
+        self._conn = None
+        if not self._stopping and (self._reconnect is None or self._reconnect.done()):
+            self._reconnect = asyncio.get_running_loop().create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        while not self._stopping and self._conn is None:
+            await asyncio.sleep(EVENTS_RECONNECT_SECONDS)
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.warning("Event listener reconnect failed", extra={"event": "events.reconnect_failed", "error": str(e)})
+                continue
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    if not queue.full():
+                        queue.put_nowait(RESYNC)
+
+    async def publish(self, user_ids: Iterable[int], message: str) -> None:
+        payload = orjson.dumps({"users": list(set(user_ids)), "message": message}).decode()
+        async with self._lock:
+            if self._conn is None:
+                logger.warning("Event dropped: listener is not connected", extra={"event": "events.dropped"})
+                return
+            await self._conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+def _postgres_dsn(url: str) -> str:
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+def create_broker(backend: str = EVENTS_BACKEND) -> Broker:
+    if backend == "postgres":
+        return PostgresBroker(_postgres_dsn(DATABASE_URL))
+    if backend == "memory":
+        return MemoryBroker()
+    raise ValueError(f"Unknown EVENTS_BACKEND {backend!r}; use 'memory' or 'postgres'")
+
+broker = create_broker()
+
+def _booking_message(event_type: str, booking: dict) -> str:
+    message = orjson.dumps({"type": event_type, "booking": booking}).decode()
+    if len(message.encode()) <= NOTIFY_MAX_BYTES:
+        return message
+    summary = {key: booking[key] for key in ("id", "customer_id", "provider_id", "status", "version")}
+    return orjson.dumps({"type": event_type, "booking": summary, "truncated": True}).decode()
+
+async def publish_booking(event_type: str, booking: dict) -> None:
+    try:
+        await broker.publish((booking["customer_id"], booking["provider_id"]), _booking_message(event_type, booking))
+    except Exception as e:
+        logger.warning("Booking event not published", extra={"event": "events.publish_failed", "booking_id": booking["id"], "error": str(e)})
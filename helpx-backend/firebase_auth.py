@@ -1,13 +1,30 @@
+import hashlib
 import json
 import os
+import re
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
-import firebase_admin
-from firebase_admin import credentials, auth
+from cache import TTLCache
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+FIREBASE_ISSUER = "https://securetoken.google.com/"
+CLOCK_SKEW_SECONDS = 60
+
+FIREBASE_VERIFIER = os.getenv("FIREBASE_VERIFIER", "google")
+FIREBASE_LOCAL_PROJECT_ID = os.getenv("FIREBASE_LOCAL_PROJECT_ID", "helpx-local")
+FIREBASE_LOCAL_SECRET = os.getenv("FIREBASE_LOCAL_SECRET", "helpx-local-firebase-signing-key")
+FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000"))
+FIREBASE_PREWARM = os.getenv("FIREBASE_PREWARM", "true").strip().lower() in ("1", "true", "yes", "on")
+FIREBASE_KEYS_MIN_REFRESH_SECONDS = float(os.getenv("FIREBASE_KEYS_MIN_REFRESH_SECONDS", "60"))
 
 _firebase_initialized = False
 
+claims_cache = TTLCache(FIREBASE_TOKEN_CACHE_SIZE, 3600)
+uid_cache = TTLCache(FIREBASE_TOKEN_CACHE_SIZE, 3600)
+
 def _default_service_account_path() -> str:
     backend_dir = Path(__file__).resolve().parent
     candidate = backend_dir / "firebase private key.json"
@@ -18,6 +35,9 @@ def init_firebase() -> None:
     if _firebase_initialized:
         return
 
+    import firebase_admin
+    from firebase_admin import credentials
+
     sa_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
     if sa_path and os.path.exists(sa_path):
         cred = credentials.Certificate(sa_path)
@@ -46,10 +66,170 @@ def init_firebase() -> None:
             "Firebase Admin not initialized. Provide service account JSON via GOOGLE_APPLICATION_CREDENTIALS or place 'firebase private key.json' in helpx-backend."
         ) from e
 
-def verify_id_token(id_token: str) -> Dict[str, Any]:
+def firebase_project_id() -> Optional[str]:
+    import firebase_admin
+
     init_firebase()
-    decoded = auth.verify_id_token(id_token, clock_skew_seconds=60)
-    return decoded
+    app_obj = firebase_admin.get_app()
+    return getattr(app_obj, "project_id", None) or app_obj.options.get("projectId")
+
+def _check_claims(claims: Dict[str, Any], project_id: str) -> Dict[str, Any]:
+    if claims.get("aud") != project_id:
+        raise ValueError(f"Firebase ID token has incorrect audience, expected {project_id}")
+    if claims.get("iss") != FIREBASE_ISSUER + project_id:
+        raise ValueError(f"Firebase ID token has incorrect issuer, expected {FIREBASE_ISSUER + project_id}")
+    subject = claims.get("sub")
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise ValueError("Firebase ID token has an invalid subject")
+    claims["uid"] = subject
+    return claims
+
+class GoogleTokenVerifier:
+    def __init__(self):
+        self._certs: Dict[str, str] = {}
+        self._certs_expire_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._fetches = 0
+        self._fetched_at = float("-inf")
+        self._project_id: Optional[str] = None
+
+    def fetch_keys(self) -> Tuple[Dict[str, str], int]:
+        import google.auth.transport.requests
+
+        request = google.auth.transport.requests.Request()
+        response = request(url=GOOGLE_CERTS_URL, method="GET")
+        if response.status != 200:
+            raise RuntimeError(f"Could not fetch Firebase signing keys: HTTP {response.status}")
+        max_age = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        return json.loads(response.data.decode("utf-8")), int(max_age.group(1)) if max_age else 3600
+
+    def refresh_keys(self, forced: bool = False) -> None:
+        fetches = self._fetches
+        with self._fetch_lock:
+            if self._fetches != fetches:
+                return
+            if forced and time.monotonic() - self._fetched_at < FIREBASE_KEYS_MIN_REFRESH_SECONDS:
+                return
+            try:
+                certs, max_age = self.fetch_keys()
+            finally:
+                self._fetches += 1
+                self._fetched_at = time.monotonic()
+            with self._lock:
+                self._certs = certs
+                self._certs_expire_at = time.time() + max_age
+
+    def warm_up(self) -> None:
+        self._project_id = firebase_project_id()
+        self.refresh_keys()
+
+    def _keys(self, kid: Optional[str]) -> Dict[str, str]:
+        if time.time() >= self._certs_expire_at:
+            self.refresh_keys()
+        elif kid and kid not in self._certs:
+            self.refresh_keys(forced=True)
+        certs = self._certs
+        if kid and kid not in certs:
+            raise ValueError(f"Firebase ID token has an unknown key id {kid}")
+        return certs
+
+    def verify(self, id_token: str) -> Dict[str, Any]:
+        from google.auth import jwt as google_jwt
+
+        if self._project_id is None:
+            self._project_id = firebase_project_id()
+        header = google_jwt.decode_header(id_token)
+        if header.get("alg") != "RS256":
+            raise ValueError("Firebase ID token has incorrect algorithm, expected RS256")
+        claims = google_jwt.decode(
+            id_token,
+            certs=self._keys(header.get("kid")),
+            audience=self._project_id,
+            clock_skew_in_seconds=CLOCK_SKEW_SECONDS,
+        )
+        return _check_claims(claims, self._project_id)
+
+class LocalTokenVerifier:
+    algorithm = "HS256"
+
+    def __init__(self, project_id: str = FIREBASE_LOCAL_PROJECT_ID, secret: str = FIREBASE_LOCAL_SECRET):
+        self.project_id = project_id
+        self.secret = secret
+
+    def warm_up(self) -> None:
+        pass
+
+    def issue_token(self, uid: str, email: Optional[str] = None, name: Optional[str] = None, expires_in: int = 3600) -> str:
+        from jose import jwt
+
+        now = int(time.time())
+        claims = {
+            "iss": FIREBASE_ISSUER + self.project_id,
+            "aud": self.project_id,
+            "sub": uid,
+            "user_id": uid,
+            "iat": now,
+            "auth_time": now,
+            "exp": now + expires_in,
+        }
+        if email:
+            claims["email"] = email
+        if name:
+            claims["name"] = name
+        return jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def verify(self, id_token: str) -> Dict[str, Any]:
+        from jose import jwt
+
+        claims = jwt.decode(
+            id_token,
+            self.secret,
+            algorithms=[self.algorithm],
+            audience=self.project_id,
+            options={"leeway": CLOCK_SKEW_SECONDS},
+        )
+        return _check_claims(claims, self.project_id)
+
+VERIFIERS = {
+    "google": GoogleTokenVerifier,
+    "local": LocalTokenVerifier,
+}
+
+_verifier = None
+
+def get_verifier():
+    global _verifier
+    if _verifier is None:
+        _verifier = VERIFIERS[FIREBASE_VERIFIER]()
+    return _verifier
+
+def set_verifier(verifier) -> None:
+    global _verifier
+    _verifier = verifier
+    claims_cache.clear()
+    uid_cache.clear()
+
+def prewarm() -> None:
+    get_verifier().warm_up()
+
+def _token_key(id_token: str) -> str:
+    return hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+
+def get_cached_claims(id_token: str) -> Optional[Dict[str, Any]]:
+    return claims_cache.get(_token_key(id_token))
+
+def verify_id_token(id_token: str, check_cache: bool = True) -> Dict[str, Any]:
+    key = _token_key(id_token)
+    claims = claims_cache.get(key) if check_cache else None
+    if claims is not None:
+        return claims
+    claims = get_verifier().verify(id_token)
+    claims_cache.set(key, claims, ttl=claims["exp"] - time.time())
+    return claims
+
+def cache_stats() -> dict:
+    return {"claims": claims_cache.stats(), "uids": uid_cache.stats()}
 
 def extract_user_info(claims: Dict[str, Any]) -> Dict[str, Optional[str]]:
     return {
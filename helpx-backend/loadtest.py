@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+SEED_PASSWORD = "loadtest-password"
+SKILL_NAMES = [
+    "Python", "JavaScript", "Guitar", "Piano", "Cooking", "Baking", "Yoga", "Spanish", "French", "Photography",
+    "Calculus", "Statistics", "Carpentry", "Plumbing", "Gardening", "Painting", "Drawing", "Chess", "Swimming", "Running",
+    "Video Editing", "Public Speaking", "Resume Writing", "Tax Filing", "Bicycle Repair", "Knitting", "Pottery", "Salsa Dancing",
+]
+SKILL_LEVELS = ["Beginner", "Intermediate", "Advanced", "Tutoring", "Lessons", "Coaching"]
+STATUSES = ["pending", "accepted", "completed", "cancelled"]
+DEFAULT_MIX = "skills=40,search=10,bookings=20,status=10,login=10,register=10"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed a throwaway database and drive a mixed workload against the HelpX API")
+    parser.add_argument("--url", default="sqlite:///loadtest.db", help="Throwaway database URL; it is wiped unless --skip-seed is given")
+    parser.add_argument("--base-url", default=None, help="Drive a running server instead of the app in process (it must use --url)")
+    parser.add_argument("--users", type=int, default=1000, help="Users to seed")
+    parser.add_argument("--skills", type=int, default=5000, help="Skills to seed")
+    parser.add_argument("--bookings", type=int, default=10000, help="Bookings to seed")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per seeding insert")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a database seeded by an earlier run with the same sizes")
+    parser.add_argument("--concurrency", default="1,16,64", help="Comma separated concurrency levels to run in turn")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run each concurrency level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of unrecorded load before each level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--tokens", type=int, default=64, help="Seeded users logged in up front for authenticated operations")
+    parser.add_argument("--page-size", type=int, default=50, help="limit used for list endpoints")
+    parser.add_argument("--rounds", type=int, default=None, help="bcrypt cost (BCRYPT_ROUNDS) for seeding and the in-process app")
+    parser.add_argument("--random-seed", type=int, default=42, help="Seed for the dataset and request mix")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation '{name}' in --mix, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(len(values) * fraction) - 1))] * 1000
+
+def skill_owner(skill_id: int, users: int) -> int:
+    return (skill_id - 1) % users + 1
+
+def booking_skill(booking_id: int, skills: int) -> int:
+    return (booking_id - 1) % skills + 1
+
+def reset_database(url: str) -> None:
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database and parsed.database != ":memory:":
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(parsed.database + suffix):
+                os.remove(parsed.database + suffix)
+
+def seed(engine, args) -> dict:
+    from sqlalchemy import insert, text
+    from models import User, Skill, Booking
+    from passwords import hash_password
+    import migrations
+    import search
+
+    rng = random.Random(args.random_seed)
+    migrations.reset(engine)
+    migrations.upgrade(engine)
+
+    started = time.perf_counter()
+    hashed = hash_password(SEED_PASSWORD)
+    now = datetime.utcnow()
+
+    free_from: Dict[int, datetime] = {}
+
+    def booking(i: int) -> dict:
+        skill_id = booking_skill(i, args.skills)
+        provider_id = skill_owner(skill_id, args.users)
+        duration = rng.randint(1, 4)
+        start = free_from.get(provider_id, now - timedelta(days=90)) + timedelta(hours=rng.randint(0, 48))
+        free_from[provider_id] = start + timedelta(hours=duration)
+        return {
+            "id": i,
+            "customer_id": rng.randint(1, args.users),
+            "provider_id": provider_id,
+            "skill_id": skill_id,
+            "status": rng.choice(STATUSES),
+            "booking_date": start,
+            "duration_hours": duration,
+            "notes": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    def batches(total: int, row):
+        for start in range(1, total + 1, args.batch_size):
+            yield [row(i) for i in range(start, min(start + args.batch_size, total + 1))]
+
+    with engine.begin() as conn:
+        for rows in batches(args.users, lambda i: {
+            "id": i, "name": f"Load User {i}", "email": f"load-{i}@example.com", "hashed_password": hashed, "bio": None,
+        }):
+            conn.execute(insert(User), rows)
+        for rows in batches(args.skills, lambda i: {
+            "id": i,
+            "skill": f"{rng.choice(SKILL_NAMES)} {rng.choice(SKILL_LEVELS)}",
+            "description": f"{rng.choice(SKILL_NAMES)} help from user {skill_owner(i, args.users)}",
+            "user_id": skill_owner(i, args.users),
+        }):
+            conn.execute(insert(Skill), rows)
+        for rows in batches(args.bookings, booking):
+            conn.execute(insert(Booking), rows)
+        if engine.dialect.name == "postgresql":
+            for table in ("users", "skills", "bookings"):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"))
+    search.rebuild_index(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    return {
+        "users": args.users,
+        "skills": args.skills,
+        "bookings": args.bookings,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+class Workload:
+    def __init__(self, client, args, tokens: List[tuple]):
+        self.client = client
+        self.args = args
+        self.tokens = tokens
+        self.run_id = uuid.uuid4().hex[:8]
+        self.registered = 0
+        self.statuses: Dict[int, str] = {}
+
+    def _auth(self, rng: random.Random):
+        user_id, token = rng.choice(self.tokens)
+        return user_id, {"Authorization": f"Bearer {token}"}
+
+    async def skills(self, rng: random.Random):
+        params = {"limit": self.args.page_size}
+        if rng.random() < 0.5:
+            params["after"] = rng.randint(0, max(self.args.skills - self.args.page_size, 0))
+        return await self.client.get("/skills", params=params)
+
+    async def search(self, rng: random.Random):
+        return await self.client.get("/skills/search", params={"q": rng.choice(SKILL_NAMES), "limit": 20})
+
+    async def bookings(self, rng: random.Random):
+        _, headers = self._auth(rng)
+        return await self.client.get("/bookings", params={"limit": self.args.page_size}, headers=headers)
+
+    async def status(self, rng: random.Random):
+        import crud
+
+        user_id, headers = self._auth(rng)
+        skill_id = user_id
+        if skill_id > self.args.skills or skill_id > self.args.bookings:
+            return await self.client.get("/me", headers=headers)
+        booking_id = skill_id + rng.randint(0, (self.args.bookings - skill_id) // self.args.skills) * self.args.skills
+        current = self.statuses.get(booking_id)
+        if current is None:
+            response = await self.client.get(f"/bookings/{booking_id}", headers=headers)
+            if response.status_code != 200:
+                return response
+            current = self.statuses[booking_id] = response.json()["booking"]["status"]
+        targets = [target for target, sources in crud.BOOKING_TRANSITIONS.items() if current in sources]
+        if not targets:
+            return await self.client.get(f"/bookings/{booking_id}", headers=headers)
+        response = await self.client.patch(f"/bookings/{booking_id}/status", json={"status": rng.choice(targets)}, headers=headers)
+        if response.status_code == 200:
+            self.statuses[booking_id] = response.json()["booking"]["status"]
+        else:
+            self.statuses.pop(booking_id, None)
+        return response
+
+    async def login(self, rng: random.Random):
+        user_id = rng.randint(1, self.args.users)
+        return await self.client.post("/login", json={"email": f"load-{user_id}@example.com", "password": SEED_PASSWORD})
+
+    async def register(self, rng: random.Random):
+        self.registered += 1
+        email = f"load-{self.run_id}-{self.registered}@example.com"
+        return await self.client.post("/register", json={"name": "Load Register", "email": email, "password": SEED_PASSWORD})
+
+OPERATIONS = {
+    "skills": ("GET /skills", Workload.skills),
+    "search": ("GET /skills/search", Workload.search),
+    "bookings": ("GET /bookings", Workload.bookings),
+    "status": ("PATCH /bookings/{booking_id}/status", Workload.status),
+    "login": ("POST /login", Workload.login),
+    "register": ("POST /register", Workload.register),
+}
+
+async def login_tokens(client, args) -> List[tuple]:
+    tokens = []
+    for user_id in range(1, min(args.tokens, args.users) + 1):
+        response = await client.post("/login", json={"email": f"load-{user_id}@example.com", "password": SEED_PASSWORD})
+        response.raise_for_status()
+        tokens.append((user_id, response.json()["access_token"]))
+    return tokens
+
+async def run_level(workload: Workload, mix: Dict[str, float], concurrency: int, args) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    statuses: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    recording = False
+
+    async def worker(index: int, deadline: float):
+        rng = random.Random(args.random_seed * 1000 + concurrency * 10 + index)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await OPERATIONS[name][1](workload, rng)
+                code = str(response.status_code)
+            except Exception as e:
+                code = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if recording:
+                samples[name].append(elapsed)
+                statuses[name][code] = statuses[name].get(code, 0) + 1
+                if not code.isdigit() or int(code) >= 500:
+                    errors[name] += 1
+
+    if args.warmup > 0:
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+    recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i, started + args.duration) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in names:
+        values = sorted(samples[name])
+        endpoints[OPERATIONS[name][0]] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "p99_ms": round(percentile(values, 0.99), 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+            "status_codes": statuses[name],
+        }
+    total = sum(len(values) for values in samples.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+async def drive(args, mix: Dict[str, float]) -> List[dict]:
+    import httpx
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with contextlib.AsyncExitStack() as stack:
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60)
+        else:
+            import main
+
+            await stack.enter_async_context(main.lifespan(main.app))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=60)
+
+        async with client:
+            workload = Workload(client, args, await login_tokens(client, args))
+            return [await run_level(workload, mix, level, args) for level in levels]
+
+def main():
+    args = parse_args()
+    mix = parse_mix(args.mix)
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("FIREBASE_PREWARM", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if args.rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+    seeded: Optional[dict] = None
+    if not args.skip_seed:
+        reset_database(args.url)
+        from database import engine
+
+        seeded = seed(engine, args)
+        print(f"seeded {args.users} users, {args.skills} skills, {args.bookings} bookings in {seeded['seconds']}s", file=sys.stderr)
+
+    levels = asyncio.run(drive(args, mix))
+    report = {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "database": args.url.split("@")[-1],
+            "target": args.base_url or "in-process",
+            "mix": mix,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "page_size": args.page_size,
+            "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+            "rate_limits": os.getenv("RATE_LIMIT_ENABLED"),
+            "random_seed": args.random_seed,
+        },
+        "seed": seeded,
+        "levels": levels,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "auth.authenticated=0.01,auth.token_rejected=0.1")
+LOG_REDACT_TOKENS = os.getenv("LOG_REDACT_TOKENS", "true").strip().lower() in ("1", "true", "yes", "on")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+REDACTED = "[REDACTED]"
+SERVER_LOGGERS = ("uvicorn.access", "uvicorn.error")
+SENSITIVE_FIELDS = {"token", "access_token", "id_token", "password", "hashed_password", "authorization"}
+
+_TOKEN_PATTERNS = [
+    re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]*"),
+    re.compile(r"(?i)(bearer\s+)[\w\-.~+/]{16,}=*"),
+]
+
+_QUERY_STRING = re.compile(r"(/[^\s\"?]*)\?[^\s\"]*")
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    pairs = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, setting = item.partition("=")
+            pairs[key.strip()] = setting.strip()
+    return pairs
+
+def redact(text: str) -> str:
+    for pattern in _TOKEN_PATTERNS:
+        text = pattern.sub(lambda m: (m.group(1) if m.groups() else "") + REDACTED, text)
+    return text
+
+def strip_query_strings(text: str) -> str:
+    return _QUERY_STRING.sub(r"\1", text)
+
+def _extras(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRS}
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None) or record.name)
+        if rate is None:
+            return True
+        return random.random() < rate
+
+class RedactingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = ()
+        for key, value in _extras(record).items():
+            if key.lower() in SENSITIVE_FIELDS:
+                setattr(record, key, REDACTED)
+            elif isinstance(value, str):
+                setattr(record, key, redact(value))
+        return True
+
+class QueryStringFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = strip_query_strings(record.msg)
+        if isinstance(record.args, tuple):
+            record.args = tuple(strip_query_strings(arg) if isinstance(arg, str) else arg for arg in record.args)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        extras = " ".join(f"{key}={value}" for key, value in _extras(record).items())
+        return f"{text} {extras}" if extras else text
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+def filter_server_logs() -> None:
+    for name in SERVER_LOGGERS:
+        server_logger = logging.getLogger(name)
+        if not any(isinstance(existing, QueryStringFilter) for existing in server_logger.filters):
+            server_logger.addFilter(QueryStringFilter())
+
+def configure_logging() -> None:
+    global _listener
+    filter_server_logs()
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    if LOG_REDACT_TOKENS:
+        output.addFilter(RedactingFilter())
+
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(records)
+    queue_handler.addFilter(SamplingFilter({event: float(rate) for event, rate in _parse_pairs(LOG_SAMPLING).items()}))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    for name, level in _parse_pairs(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,30 +1,127 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Body
+from fastapi import FastAPI, Depends, HTTPException, Query, Body, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import timedelta
-import uvicorn
-from pydantic import BaseModel, EmailStr
-
-from database import engine, get_db, Base
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import time
+import base64
+import orjson
+import logging
+from pydantic import BaseModel, EmailStr, Field
+
+from logging_config import configure_logging
+from database import (
+    engine, get_async_db, get_async_read_db, connect_async_engine, pool_status, replicas,
+    ReadAfterWriteMiddleware, READ_AFTER_HEADER
+)
 from models import User, Skill, Booking
 import crud
+import crud_async
+import search
+import metrics
+import migrations
+import availability
+import events
+import ratelimit
+import recommend
+import response_cache
+import schemas
+import stats
+from schemas import Token
 from auth import (
-    authenticate_user, 
+    authenticate_user_async, 
     create_access_token, 
-    get_current_user,
+    get_current_user_async,
+    load_user_async,
+    user_id_from_token,
+    token_expires_at,
+    cache_stats as auth_cache_stats,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from firebase_auth import verify_id_token as firebase_verify_id_token, extract_user_info as firebase_extract_user_info, init_firebase
-import firebase_admin
+from passwords import PasswordHashingBusy
+from availability import BookingConflict
+import passwords
+from firebase_auth import (
+    verify_id_token as firebase_verify_id_token,
+    get_cached_claims as firebase_get_cached_claims,
+    extract_user_info as firebase_extract_user_info,
+    firebase_project_id,
+    prewarm as firebase_prewarm,
+    cache_stats as firebase_cache_stats,
+    uid_cache as firebase_uid_cache,
+    FIREBASE_PREWARM,
+)
+
+logger = logging.getLogger(__name__)
+
+async def run_migrations():
+    if migrations.migrate_on_startup():
+        await run_in_threadpool(migrations.upgrade, engine)
+
+async def warm_up_database():
+    await connect_async_engine()
+
+async def start_replica_checks():
+    await replicas.start()
+
+async def start_event_broker():
+    await events.broker.start()
+
+async def start_rate_limit_backend():
+    await ratelimit.backend.start()
 
-Base.metadata.create_all(bind=engine)
+async def start_password_workers():
+    await run_in_threadpool(passwords.start)
+
+async def prewarm_firebase_keys():
+    if not FIREBASE_PREWARM:
+        return
+    try:
+        await run_in_threadpool(firebase_prewarm)
+    except Exception as e:
+        logger.warning("Firebase signing keys not pre-warmed", extra={"event": "firebase.prewarm_failed", "error": str(e)})
+
+def prewarm_recommendations():
+    if recommend.RECOMMEND_PREWARM:
+        recommend.start_build()
+
+def stop_password_workers():
+    passwords.shutdown()
+
+async def stop_event_broker():
+    await events.broker.stop()
+
+async def stop_replica_checks():
+    await replicas.stop()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    await run_migrations()
+    await warm_up_database()
+    await start_replica_checks()
+    await start_event_broker()
+    await start_rate_limit_backend()
+    await start_password_workers()
+    await prewarm_firebase_keys()
+    prewarm_recommendations()
+    try:
+        yield
+    finally:
+        stop_password_workers()
+        await stop_event_broker()
+        await stop_replica_checks()
 
 app = FastAPI(
     title="HelpX API",
     description="A skill-sharing platform backend where users can register and share their skills",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -33,7 +130,64 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=[READ_AFTER_HEADER],
 )
+app.add_middleware(ReadAfterWriteMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+def _pool_metrics():
+    samples = []
+    status = pool_status()
+    engines = {name: status[name] for name in ("sync", "async")}
+    for replica in status["replicas"]:
+        engines.update({f"{replica['name']}_sync": replica["sync"], f"{replica['name']}_async": replica["async"]})
+        samples.append(("helpx_db_replica_healthy", "gauge", "Whether a read replica is receiving reads", {"replica": replica["name"]}, int(replica["healthy"])))
+        samples.append(("helpx_db_replica_lag_seconds", "gauge", "Replication lag at the last health check", {"replica": replica["name"]}, replica["lag_seconds"] or 0))
+    for engine_name, stats in engines.items():
+        labels = {"engine": engine_name}
+        samples.append(("helpx_db_pool_checked_out", "gauge", "Connections currently checked out of the pool", labels, stats["checked_out"] or 0))
+        samples.append(("helpx_db_pool_overflow", "gauge", "Overflow connections currently open", labels, stats["overflow"] or 0))
+        samples.append(("helpx_db_pool_checkouts_total", "counter", "Connections checked out of the pool", labels, stats["checkouts"]))
+        samples.append(("helpx_db_pool_timeouts_total", "counter", "Pool checkouts that timed out", labels, stats["timeouts"]))
+        samples.append(("helpx_db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection", labels, stats["wait_seconds_total"]))
+    samples.append(("helpx_password_hash_queue_depth", "gauge", "bcrypt operations queued or running", {}, passwords.queue_depth()))
+    samples.append(("helpx_auth_requests_in_flight", "gauge", "Requests on bcrypt-bound routes currently admitted", {}, ratelimit.in_flight()))
+    caches = {f"auth_{name}": stats for name, stats in auth_cache_stats().items()}
+    caches.update({f"firebase_{name}": stats for name, stats in firebase_cache_stats().items()})
+    caches["availability"] = availability.cache_stats()
+    caches["responses"] = response_cache.cache_stats()
+    samples.append(("helpx_recommend_index_skills", "gauge", "Skills in the recommendation index", {}, recommend.index.size))
+    samples.append(("helpx_event_subscribers", "gauge", "Open booking event connections", {}, events.broker.subscriber_count()))
+    samples.append(("helpx_events_delivered_total", "counter", "Booking events queued for a connection", {}, events.broker.delivered))
+    samples.append(("helpx_event_overflows_total", "counter", "Connections whose event queue overflowed and were told to resync", {}, events.broker.overflows))
+    for cache_name, cache_stats in caches.items():
+        labels = {"cache": cache_name}
+        samples.append(("helpx_cache_hits_total", "counter", "Cache hits", labels, cache_stats["hits"]))
+        samples.append(("helpx_cache_misses_total", "counter", "Cache misses", labels, cache_stats["misses"]))
+        samples.append(("helpx_cache_size", "gauge", "Entries currently cached", labels, cache_stats["size"]))
+    return samples
+
+metrics.registry.add_collector(_pool_metrics)
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request, exc: PasswordHashingBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(ratelimit.RateLimited)
+async def rate_limited_handler(request, exc: ratelimit.RateLimited):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(ratelimit.Overloaded)
+async def overloaded_handler(request, exc: ratelimit.Overloaded):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(recommend.IndexWarming)
+async def recommend_index_warming_handler(request, exc: recommend.IndexWarming):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+@app.exception_handler(BookingConflict)
+async def booking_conflict_handler(request, exc: BookingConflict):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
 
 class UserRegister(BaseModel):
     name: str
@@ -45,13 +199,6 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
-class Token(BaseModel):
-    message: str
-    success: bool
-    access_token: str
-    token_type: str
-    user: dict
-
 class FirebaseTokenIn(BaseModel):
     id_token: str
 
@@ -59,13 +206,70 @@ class BookingCreate(BaseModel):
     provider_id: int
     skill_id: int
     booking_date: Optional[str] = None
-    duration_hours: int = 1
+    duration_hours: int = Field(1, ge=1, le=availability.MAX_BOOKING_HOURS)
     notes: Optional[str] = None
 
+class SkillCreate(BaseModel):
+    skill: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+
 class BookingStatusUpdate(BaseModel):
     status: str  # "pending", "accepted", "completed", "cancelled"
+    version: Optional[int] = None
+
+def _parse_booking_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _check_batch_size(items: list) -> None:
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > crud.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {crud.MAX_BATCH_SIZE} items")
+
+def _page_response(key: str, rows: list, limit: int) -> dict:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "success": True,
+        "count": len(rows),
+        key: [row.to_dict() for row in rows],
+        "next_cursor": rows[-1].id if has_more and rows else None
+    }
 
-@app.get("/")
+def _booking_cursor(booking: Booking, sort: str):
+    if sort == "id":
+        return booking.id
+    value = booking.scheduled_at if sort == "booking_date" else booking.created_at
+    return base64.urlsafe_b64encode(f"{value.isoformat()}|{booking.id}".encode()).decode()
+
+def _parse_booking_cursor(value: Optional[str], sort: str) -> Optional[crud.BookingCursor]:
+    if value is None:
+        return None
+    if sort == "id":
+        return int(value)
+    stamp, booking_id = base64.urlsafe_b64decode(value.encode()).decode().split("|")
+    return datetime.fromisoformat(stamp), int(booking_id)
+
+async def _cached_json(request: Request, db: AsyncSession, tables: tuple, build) -> Response:
+    key = response_cache.cache_key(request, await db.run_sync(response_cache.load_versions, tables, not replicas.replicas))
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = response_cache.store(key, ORJSONResponse(await build()).body)
+    return response_cache.respond(request, entry)
+
+async def _ndjson_lines(rows: AsyncIterable):
+    async for row in rows:
+        yield orjson.dumps(row.to_dict()) + b"\n"
+
+def _ndjson(rows: AsyncIterable) -> StreamingResponse:
+    return StreamingResponse(_ndjson_lines(rows), media_type="application/x-ndjson")
+
+@app.get("/", response_model=schemas.RootResponse)
 def read_root():
     return {
         "message": "Welcome to HelpX API - A Skill Sharing Platform",
@@ -75,42 +279,56 @@ def read_root():
             "login": "/login",
             "users": "/users",
             "skills": "/skills",
+            "search_skills": "/skills/search",
+            "recommendations": "/recommendations",
             "add_skill": "/add-skill",
             "me": "/me"
         }
     }
 
-@app.get("/firebase/project")
+@app.get("/firebase/project", response_model=schemas.FirebaseProjectResponse)
 def firebase_project_info():
     try:
-        init_firebase()
-        app_obj = firebase_admin.get_app()
-        project_id = getattr(app_obj, 'project_id', None) or app_obj.options.get('projectId')
-        return {"success": True, "project_id": project_id}
+        return {"success": True, "project_id": firebase_project_id()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Firebase not initialized: {e}")
 
+@app.get("/db/pool", response_model=schemas.PoolStatusResponse)
+def database_pool_status():
+    return {"success": True, **pool_status()}
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats", response_model=schemas.CacheStatsResponse)
+def get_cache_stats():
+    return {"success": True, "auth": auth_cache_stats(), "firebase": firebase_cache_stats(), "availability": availability.cache_stats(), "responses": response_cache.cache_stats()}
+
 @app.post("/register", response_model=Token)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(
+    user_data: UserRegister,
+    db: AsyncSession = Depends(get_async_db),
+    guard: ratelimit.Guard = Depends(ratelimit.guard("register"))
+):
+    await guard.limit_email(user_data.email)
     try:
-        print(f"🔍 Registration attempt: {user_data.email}")
+        logger.info("Registration attempt", extra={"event": "register.attempt", "email": user_data.email})
         
-        existing_user = crud.get_user_by_email(db, email=user_data.email)
+        existing_user = await crud_async.get_user_by_email(db, email=user_data.email)
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         if len(user_data.password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
-        print(f"🔍 Creating user: {user_data.name}")
-        new_user = crud.create_user(db, name=user_data.name, email=user_data.email, password=user_data.password, bio=user_data.bio)
-        print(f"✅ User created with ID: {new_user.id}")
+        new_user = await crud_async.create_user(db, name=user_data.name, email=user_data.email, password=user_data.password, bio=user_data.bio)
+        logger.info("User registered", extra={"event": "register.created", "user_id": new_user.id})
         
         access_token = create_access_token(
             data={"sub": new_user.id},
             expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         )
-        print(f"✅ Token created successfully")
         
         return {
             "message": "User created successfully",
@@ -120,23 +338,33 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
             "user": new_user.to_dict()
         }
         
+    except (HTTPException, PasswordHashingBusy):
+        raise
     except Exception as e:
-        print(f"❌ Registration failed: {str(e)}")
-        print(f"❌ Error type: {type(e).__name__}")
+        logger.exception("Registration failed", extra={"event": "register.failed"})
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
-@app.post("/auth/firebase/session", response_model=Token)
-def create_session_from_firebase_token(payload: FirebaseTokenIn, db: Session = Depends(get_db)):
+@app.post("/auth/firebase/session", response_model=Token, dependencies=[Depends(ratelimit.guard("firebase-session"))])
+async def create_session_from_firebase_token(payload: FirebaseTokenIn, db: AsyncSession = Depends(get_async_db)):
     try:
-        claims = firebase_verify_id_token(payload.id_token)
+        claims = firebase_get_cached_claims(payload.id_token)
+        if claims is None:
+            claims = await run_in_threadpool(firebase_verify_id_token, payload.id_token, check_cache=False)
         info = firebase_extract_user_info(claims)
         if not info.get("email"):
             raise HTTPException(status_code=400, detail="Firebase token missing email")
 
-        user = crud.get_user_by_email(db, email=info["email"])
-        if not user:
-            name = info.get("name") or info["email"].split("@")[0]
-            user = crud.create_user(db, name=name, email=info["email"], password=f"firebase-{info['uid'] or 'uid'}")
+        user = None
+        user_id = firebase_uid_cache.get(info["uid"]) if info["uid"] else None
+        if user_id is not None:
+            user = await load_user_async(db, user_id)
+        if user is None:
+            user = await crud_async.get_user_by_email(db, email=info["email"])
+            if not user:
+                name = info.get("name") or info["email"].split("@")[0]
+                user = await crud_async.create_user(db, name=name, email=info["email"], password=f"firebase-{info['uid'] or 'uid'}")
+            if info["uid"]:
+                firebase_uid_cache.set(info["uid"], user.id)
 
         access_token = create_access_token(
             data={"sub": user.id},
@@ -149,14 +377,19 @@ def create_session_from_firebase_token(payload: FirebaseTokenIn, db: Session = D
             "token_type": "bearer",
             "user": user.to_dict(),
         }
-    except HTTPException:
+    except (HTTPException, PasswordHashingBusy):
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid Firebase token: {e}")
 
 @app.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_data.email, user_data.password)
+async def login(
+    user_data: UserLogin,
+    db: AsyncSession = Depends(get_async_db),
+    guard: ratelimit.Guard = Depends(ratelimit.guard("login"))
+):
+    await guard.limit_email(user_data.email)
+    user = await authenticate_user_async(db, user_data.email, user_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -176,101 +409,183 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
         "user": user.to_dict()
     }
 
-@app.get("/me")
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+@app.get("/me", response_model=schemas.UserDetail)
+async def get_current_user_info(current_user: User = Depends(get_current_user_async)):
     return {
         "success": True,
         "user": current_user.to_dict()
     }
 
-@app.get("/users")
-def get_users(db: Session = Depends(get_db)):
-    users = crud.get_all_users(db)
-    return {
-        "success": True,
-        "count": len(users),
-        "users": [user.to_dict() for user in users]
-    }
+@app.get("/users", response_model=schemas.UsersPage)
+async def get_users(
+    request: Request,
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Return users with an ID greater than this cursor"),
+    stream: bool = Query(False, description="Stream every user as newline-delimited JSON"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    if stream:
+        return _ndjson(crud_async.iter_users(db, after=after))
+    
+    async def build():
+        users = await crud_async.get_users_page(db, limit=limit + 1, after=after)
+        return _page_response("users", users, limit)
+    
+    return await _cached_json(request, db, ("users",), build)
 
-@app.post("/add-user")
-def add_user(
+@app.post("/add-user", response_model=schemas.UserResponse)
+async def add_user(
     name: str = Query(..., description="User's name"),
     email: str = Query(..., description="User's email"),
     password: str = Query(..., description="User's password"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    guard: ratelimit.Guard = Depends(ratelimit.guard("add-user"))
 ):
-    existing_user = crud.get_user_by_email(db, email=email)
+    await guard.limit_email(email)
+    existing_user = await crud_async.get_user_by_email(db, email=email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    new_user = crud.create_user(db, name=name, email=email, password=password)
+    new_user = await crud_async.create_user(db, name=name, email=email, password=password)
     return {
         "success": True,
         "message": "User created successfully",
         "user": new_user.to_dict()
     }
 
-@app.get("/skills")
-def get_skills(
+@app.get("/skills", response_model=schemas.SkillsPage)
+async def get_skills(
+    request: Request,
     user_id: int = Query(None, description="Filter skills by user ID (optional)"),
-    db: Session = Depends(get_db)
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Return skills with an ID greater than this cursor"),
+    stream: bool = Query(False, description="Stream every skill as newline-delimited JSON"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    if user_id:
-        user = crud.get_user_by_id(db, user_id=user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        skills = crud.get_skills_by_user(db, user_id=user_id)
-    else:
-        skills = crud.get_all_skills(db)
+    async def build():
+        if user_id:
+            user = await crud_async.get_user_by_id(db, user_id=user_id)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+        skills = await crud_async.get_skills_page(db, user_id=user_id or None, limit=limit + 1, after=after)
+        return _page_response("skills", skills, limit)
     
+    if stream:
+        if user_id and not await crud_async.get_user_by_id(db, user_id=user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        return _ndjson(crud_async.iter_skills(db, user_id=user_id or None, after=after))
+    return await _cached_json(request, db, ("skills", "users"), build)
+
+@app.get("/skills/search", response_model=schemas.SkillSearchResponse)
+async def search_skills(
+    q: str = Query(..., min_length=1, description="Search text matched against skill names and descriptions"),
+    limit: int = Query(search.DEFAULT_SEARCH_LIMIT, ge=1, le=search.MAX_SEARCH_LIMIT, description="Maximum number of results"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    results = await crud_async.search_skills(db, q, limit=limit)
+    return {
+        "success": True,
+        "query": q,
+        "count": len(results),
+        "skills": [dict(skill.to_dict(), score=score) for skill, score in results]
+    }
+
+async def _recommend_index_ready() -> None:
+    if not recommend.index.is_ready():
+        recommend.start_build()
+        await run_in_threadpool(recommend.index.wait, recommend.RECOMMEND_WAIT_SECONDS)
+
+@app.get("/skills/{skill_id}/similar", response_model=schemas.SimilarSkillsResponse)
+async def similar_skills(
+    skill_id: int,
+    limit: int = Query(recommend.DEFAULT_RECOMMEND_LIMIT, ge=1, le=recommend.MAX_RECOMMEND_LIMIT, description="Maximum number of results"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    await _recommend_index_ready()
+    results = await crud_async.get_similar_skills(db, skill_id, limit=limit)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Skill not found")
+    return {
+        "success": True,
+        "skill_id": skill_id,
+        "count": len(results),
+        "skills": [dict(skill.to_dict(), score=score) for skill, score in results]
+    }
+
+@app.get("/recommendations", response_model=schemas.RecommendationsResponse)
+async def get_recommendations(
+    user_id: int = Query(..., description="User to recommend skills for"),
+    limit: int = Query(recommend.DEFAULT_RECOMMEND_LIMIT, ge=1, le=recommend.MAX_RECOMMEND_LIMIT, description="Maximum number of results"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    if not await crud_async.get_user_by_id(db, user_id=user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    await _recommend_index_ready()
+    results = await crud_async.get_recommendations(db, user_id, limit=limit)
     return {
         "success": True,
-        "count": len(skills),
-        "skills": [skill.to_dict() for skill in skills]
+        "user_id": user_id,
+        "count": len(results),
+        "skills": [dict(skill.to_dict(), score=score) for skill, score in results]
     }
 
-@app.post("/add-skill")
-def add_skill(
+@app.post("/add-skill", response_model=schemas.SkillResponse)
+async def add_skill(
     skill: str = Query(..., description="Skill name"),
     description: str = Query(..., description="Skill description"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    print(f"✅ Authenticated user: {current_user.name} (ID: {current_user.id})")
-    new_skill = crud.create_skill(db, skill=skill, description=description, user_id=current_user.id)
+    new_skill = await crud_async.create_skill(db, skill=skill, description=description, user_id=current_user.id)
     return {
         "success": True,
         "message": "Skill added successfully",
         "skill": new_skill.to_dict()
     }
 
-@app.post("/bookings")
-def create_booking(
+@app.post("/skills/batch", response_model=schemas.SkillBatchResponse)
+async def add_skills_batch(
+    skills: List[SkillCreate] = Body(...),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    _check_batch_size(skills)
+    created = await crud_async.create_skills(
+        db,
+        current_user.id,
+        [{"skill": item.skill, "description": item.description} for item in skills]
+    )
+    return {
+        "success": True,
+        "message": f"{len(created)} skills added successfully",
+        "created": len(created),
+        "results": [{"index": index, "success": True, "skill": skill.to_dict()} for index, skill in enumerate(created)]
+    }
+
+@app.post("/bookings", response_model=schemas.BookingResponse)
+async def create_booking(
     booking_data: BookingCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        skill = db.query(Skill).filter(Skill.id == booking_data.skill_id).first()
+        skill = await crud_async.get_skill_by_id(db, booking_data.skill_id)
         if not skill:
             raise HTTPException(status_code=404, detail="Skill not found")
         
-        provider = db.query(User).filter(User.id == booking_data.provider_id).first()
+        provider = await crud_async.get_user_by_id(db, booking_data.provider_id)
         if not provider:
             raise HTTPException(status_code=404, detail="Provider not found")
         
         if booking_data.provider_id == current_user.id:
             raise HTTPException(status_code=400, detail="Cannot book your own service")
         
-        from datetime import datetime
-        booking_date = None
-        if booking_data.booking_date:
-            try:
-                booking_date = datetime.fromisoformat(booking_data.booking_date.replace('Z', '+00:00'))
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+        try:
+            booking_date = _parse_booking_date(booking_data.booking_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
         
-        new_booking = crud.create_booking(
+        new_booking = await crud_async.create_booking(
             db=db,
             customer_id=current_user.id,
             provider_id=booking_data.provider_id,
@@ -280,48 +595,197 @@ def create_booking(
             notes=booking_data.notes
         )
         
+        booking = new_booking.to_dict()
+        await events.publish_booking("booking.created", booking)
         return {
             "success": True,
             "message": "Booking created successfully",
-            "booking": new_booking.to_dict()
+            "booking": booking
         }
-    except HTTPException:
+    except (HTTPException, BookingConflict):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create booking: {str(e)}")
 
-@app.get("/bookings")
-def get_bookings(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+@app.post("/bookings/batch", response_model=schemas.BookingBatchResponse)
+async def create_bookings_batch(
+    bookings: List[BookingCreate] = Body(...),
+    all_or_nothing: bool = Query(False, description="Create nothing if any booking is invalid"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    _check_batch_size(bookings)
+    skills = await crud_async.get_skills_by_ids(db, [item.skill_id for item in bookings])
+    providers = await crud_async.get_users_by_ids(db, [item.provider_id for item in bookings])
+
+    results, valid = [], []
+    for index, item in enumerate(bookings):
+        error = None
+        booking_date = None
+        if item.skill_id not in skills:
+            error = "Skill not found"
+        elif item.provider_id not in providers:
+            error = "Provider not found"
+        elif item.provider_id == current_user.id:
+            error = "Cannot book your own service"
+        else:
+            try:
+                booking_date = _parse_booking_date(item.booking_date)
+            except ValueError:
+                error = "Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"
+        if error:
+            results.append({"index": index, "success": False, "error": error})
+            continue
+        results.append({"index": index, "success": True})
+        valid.append((index, {
+            "provider_id": item.provider_id,
+            "skill_id": item.skill_id,
+            "booking_date": booking_date,
+            "duration_hours": item.duration_hours,
+            "notes": item.notes
+        }))
+
+    conflicts = await crud_async.find_booking_conflicts(db, [row for _, row in valid])
+    for (index, _), conflict in zip(valid, conflicts):
+        if conflict:
+            results[index] = {"index": index, "success": False, "error": "The provider already has a booking at that time"}
+    valid = [item for item, conflict in zip(valid, conflicts) if not conflict]
+
+    failed = len(bookings) - len(valid)
+    if failed and all_or_nothing:
+        return ORJSONResponse(status_code=400, content={
+            "success": False,
+            "message": f"{failed} bookings are invalid, none were created",
+            "created": 0,
+            "failed": failed,
+            "results": results
+        })
+
+    created = await crud_async.create_bookings(db, current_user.id, [row for _, row in valid]) if valid else []
+    for (index, _), booking in zip(valid, created):
+        results[index]["booking"] = booking.to_dict()
+        await events.publish_booking("booking.created", results[index]["booking"])
+    return {
+        "success": failed == 0,
+        "message": f"{len(created)} bookings created, {failed} failed",
+        "created": len(created),
+        "failed": failed,
+        "results": results
+    }
+
+@app.get("/providers/{provider_id}/availability", response_model=schemas.AvailabilityResponse)
+async def get_provider_availability(
+    provider_id: int,
+    start: Optional[str] = Query(None, alias="from", description="Start of the window (ISO 8601, default: now)"),
+    end: Optional[str] = Query(None, alias="to", description="End of the window (ISO 8601, default: 7 days after from)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        window_start = _parse_booking_date(start) or datetime.utcnow()
+        window_end = _parse_booking_date(end) or window_start + timedelta(days=7)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if window_end - window_start > timedelta(days=availability.MAX_AVAILABILITY_DAYS):
+        raise HTTPException(status_code=400, detail=f"The window is limited to {availability.MAX_AVAILABILITY_DAYS} days")
+
+    provider = await crud_async.get_user_by_id(db, provider_id)
+    if not provider:
+        raise HTTPException(status_code=404, detail="Provider not found")
+
+    free, busy = await crud_async.get_provider_availability(db, provider_id, window_start, window_end)
+    return {
+        "success": True,
+        "provider_id": provider_id,
+        "from": window_start,
+        "to": window_end,
+        "free": [{"start": free_start, "end": free_end} for free_start, free_end in free],
+        "busy": [{"start": busy_start, "end": busy_end} for busy_start, busy_end in busy]
+    }
+
+@app.get("/providers/{provider_id}/stats", response_model=schemas.ProviderStatsResponse)
+async def get_provider_stats(provider_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    if not await crud_async.get_user_by_id(db, provider_id):
+        raise HTTPException(status_code=404, detail="Provider not found")
+    return {"success": True, **await crud_async.get_provider_stats(db, provider_id)}
+
+@app.get("/stats/top-skills", response_model=schemas.TopSkillsResponse)
+async def get_top_skills(
+    limit: int = Query(stats.DEFAULT_TOP_SKILLS, ge=1, le=stats.MAX_TOP_SKILLS, description="Maximum number of skills"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    skills = await crud_async.get_top_skills(db, limit)
+    return {"success": True, "count": len(skills), "skills": skills}
+
+@app.get("/bookings", response_model=schemas.BookingsPage)
+async def get_bookings(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
     as_customer: bool = Query(None, description="Filter bookings as customer"),
-    as_provider: bool = Query(None, description="Filter bookings as provider")
+    as_provider: bool = Query(None, description="Filter bookings as provider"),
+    status: Optional[List[str]] = Query(None, description="Only bookings with these statuses (repeatable)"),
+    start: Optional[str] = Query(None, alias="from", description="Only bookings scheduled at or after this time (ISO 8601)"),
+    end: Optional[str] = Query(None, alias="to", description="Only bookings scheduled before this time (ISO 8601)"),
+    sort: str = Query("id", description="Order by id, booking_date or created_at"),
+    order: str = Query("asc", description="asc or desc"),
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="The next_cursor of the previous page"),
+    summary: bool = Query(True, description="Include booking counts by status"),
+    stream: bool = Query(False, description="Stream every booking as newline-delimited JSON")
 ):
+    if sort not in crud.BOOKING_SORTS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Must be one of: {', '.join(crud.BOOKING_SORTS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Must be asc or desc")
+    if status and not set(status) <= set(crud.BOOKING_STATUSES):
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(crud.BOOKING_STATUSES)}")
     try:
-        if as_customer:
-            bookings = crud.get_bookings_by_customer(db, current_user.id)
-        elif as_provider:
-            bookings = crud.get_bookings_by_provider(db, current_user.id)
-        else:
-            customer_bookings = crud.get_bookings_by_customer(db, current_user.id)
-            provider_bookings = crud.get_bookings_by_provider(db, current_user.id)
-            bookings = customer_bookings + provider_bookings
-        
-        return {
+        window_start = _parse_booking_date(start)
+        window_end = _parse_booking_date(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+    try:
+        cursor = _parse_booking_cursor(after, sort)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    filters = dict(
+        as_customer=bool(as_customer),
+        as_provider=bool(as_provider),
+        statuses=status,
+        start=window_start,
+        end=window_end,
+        sort=sort,
+        descending=order == "desc"
+    )
+    try:
+        if stream:
+            return _ndjson(crud_async.iter_bookings(db, current_user.id, after=cursor, **filters))
+        bookings = await crud_async.get_bookings_page(db, current_user.id, limit=limit + 1, after=cursor, **filters)
+        has_more = len(bookings) > limit
+        bookings = bookings[:limit]
+        response = {
             "success": True,
             "count": len(bookings),
-            "bookings": [booking.to_dict() for booking in bookings]
+            "bookings": [booking.to_dict() for booking in bookings],
+            "next_cursor": _booking_cursor(bookings[-1], sort) if has_more and bookings else None
         }
+        if summary:
+            response["summary"] = await crud_async.count_bookings_by_status(
+                db, current_user.id, as_customer=bool(as_customer), as_provider=bool(as_provider), start=window_start, end=window_end
+            )
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get bookings: {str(e)}")
 
-@app.get("/bookings/{booking_id}")
-def get_booking(
+@app.get("/bookings/{booking_id}", response_model=schemas.BookingDetail)
+async def get_booking(
     booking_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    booking = crud.get_booking_by_id(db, booking_id)
+    booking = await crud_async.get_booking_by_id(db, booking_id)
     
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -334,54 +798,131 @@ def get_booking(
         "booking": booking.to_dict()
     }
 
-@app.patch("/bookings/{booking_id}/status")
-def update_booking_status(
+@app.patch("/bookings/{booking_id}/status", response_model=schemas.BookingResponse)
+async def update_booking_status(
     booking_id: int,
     status_update: BookingStatusUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    booking = crud.get_booking_by_id(db, booking_id)
+    if status_update.status not in crud.BOOKING_TRANSITIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(crud.BOOKING_TRANSITIONS)}")
     
-    if not booking:
+    try:
+        booking = await crud_async.transition_booking(
+            db, booking_id, status_update.status, current_user.id, expected_version=status_update.version
+        )
+    except crud.BookingNotFound:
         raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking.provider_id != current_user.id:
+    except crud.BookingForbidden:
         raise HTTPException(status_code=403, detail="Only the service provider can update booking status")
-    
-    valid_statuses = ["pending", "accepted", "completed", "cancelled"]
-    if status_update.status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
-    
-    updated_booking = crud.update_booking_status(db, booking_id, status_update.status)
+    await events.publish_booking("booking.updated", booking)
     
     return {
         "success": True,
         "message": f"Booking status updated to {status_update.status}",
-        "booking": updated_booking.to_dict()
+        "booking": booking
     }
 
-@app.delete("/bookings/{booking_id}")
-def cancel_booking(
+@app.delete("/bookings/{booking_id}", response_model=schemas.BookingResponse)
+async def cancel_booking(
     booking_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    version: Optional[int] = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    booking = crud.get_booking_by_id(db, booking_id)
-    
-    if not booking:
+    try:
+        booking = await crud_async.transition_booking(
+            db, booking_id, "cancelled", current_user.id, provider_only=False, expected_version=version
+        )
+    except crud.BookingNotFound:
         raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking.customer_id != current_user.id and booking.provider_id != current_user.id:
+    except crud.BookingForbidden:
         raise HTTPException(status_code=403, detail="Not authorized to cancel this booking")
-    
-    updated_booking = crud.update_booking_status(db, booking_id, "cancelled")
+    await events.publish_booking("booking.updated", booking)
     
     return {
         "success": True,
         "message": "Booking cancelled successfully",
-        "booking": updated_booking.to_dict()
+        "booking": booking
     }
 
+async def _forward_events(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    while True:
+        await websocket.send_text(await queue.get())
+
+async def _receive_until_disconnect(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+async def _websocket_user_id(websocket: WebSocket) -> Tuple[Optional[int], Optional[float]]:
+    try:
+        message = orjson.loads(await asyncio.wait_for(websocket.receive_text(), events.EVENTS_AUTH_TIMEOUT))
+    except (asyncio.TimeoutError, orjson.JSONDecodeError):
+        return None, None
+    if not isinstance(message, dict) or message.get("type") != "auth" or not isinstance(message.get("token"), str):
+        return None, None
+    user_id = user_id_from_token(message["token"])
+    return user_id, token_expires_at(message["token"]) if user_id is not None else None
+
+@app.websocket("/ws/bookings")
+async def booking_events(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        user_id, expires_at = await _websocket_user_id(websocket)
+    except WebSocketDisconnect:
+        return
+    if user_id is None:
+        await websocket.close(code=1008)
+        return
+    queue = events.broker.subscribe(user_id)
+    queue.put_nowait(events.SUBSCRIBED)
+    sender = asyncio.create_task(_forward_events(websocket, queue))
+    receiver = asyncio.create_task(_receive_until_disconnect(websocket))
+    try:
+        await asyncio.wait(
+            {sender, receiver},
+            timeout=max(expires_at - time.time(), 0) if expires_at is not None else None,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+        events.broker.unsubscribe(user_id, queue)
+    if receiver.cancelled():
+        failed = not sender.cancelled() and sender.exception() is not None
+        if failed:
+            logger.warning("Booking event sender failed", exc_info=sender.exception(), extra={"event": "events.sender_failed", "user_id": user_id})
+        try:
+            await websocket.close(code=1011 if failed else 1008)
+        except Exception:
+            pass
+
+def serve():
+    import argparse
+    import os
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the HelpX API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")), help="Worker processes (production mode)")
+    parser.add_argument("--reload", action="store_true", help="Development mode: one process that restarts on code changes")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.reload:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
+        return
+    if migrations.migrate_on_startup():
+        migrations.upgrade(engine)
+    os.environ["MIGRATE_ON_STARTUP"] = "false"
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    uvicorn.run(app if args.workers == 1 else "main:app", host=args.host, port=args.port, workers=args.workers)
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    serve()
@@ -0,0 +1,218 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors: Dict[str, Callable[[], List[Tuple[str, str, str, Dict[str, str], float]]]] = {}
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[Tuple[str, str, str, Dict[str, str], float]]]) -> None:
+        self._collectors[collector.__qualname__] = collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in self._collectors.values():
+            for name, kind, help_text, labels, value in collector():
+                family = families.setdefault(name, (kind, help_text, []))
+                family[2].append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter("helpx_http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")))
+http_latency = registry.register(Histogram("helpx_http_request_duration_seconds", "HTTP request latency", ("method", "route")))
+http_in_flight = registry.register(Gauge("helpx_http_requests_in_flight", "HTTP requests currently being served"))
+db_queries = registry.register(Counter("helpx_db_queries_total", "SQL statements executed, by route", ("route",)))
+db_query_seconds = registry.register(Counter("helpx_db_query_seconds_total", "Time spent executing SQL statements, by route", ("route",)))
+db_query_latency = registry.register(Histogram("helpx_db_query_duration_seconds", "SQL statement latency", (), QUERY_BUCKETS))
+db_queries_per_request = registry.register(Histogram("helpx_db_queries_per_request", "SQL statements executed per request", ("route",), (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)))
+password_hash_latency = registry.register(Histogram("helpx_password_hash_duration_seconds", "bcrypt operation latency including queueing", ("operation",)))
+password_hash_seconds = registry.register(Counter("helpx_password_hash_seconds_total", "Time spent in bcrypt operations, by route", ("route",)))
+password_pool_rebuilds = registry.register(Counter("helpx_password_pool_rebuilds_total", "Times the bcrypt process pool broke and was rebuilt"))
+rate_limited = registry.register(Counter("helpx_rate_limited_total", "Requests rejected with 429 by a token bucket", ("route", "scope")))
+admission_shed = registry.register(Counter("helpx_admission_shed_total", "Requests rejected with 503 because too many bcrypt-bound requests were in flight", ("route",)))
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds", "password_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.password_seconds = 0.0
+
+_request_stats: "ContextVar[Optional[RequestStats]]" = ContextVar("helpx_request_stats", default=None)
+
+def record_query(elapsed: float) -> None:
+    db_query_latency.observe(value=elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+def record_password_hash(operation: str, elapsed: float) -> None:
+    password_hash_latency.observe(operation, value=elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.password_seconds += elapsed
+
+def instrument_engine(engine) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("helpx_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("helpx_query_started")
+        if started:
+            record_query(time.perf_counter() - started.pop())
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = "unmatched"
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            _request_stats.reset(token)
+            route = self._route(scope)
+            method = scope["method"]
+            http_requests.inc(method, route, status_code)
+            http_latency.observe(method, route, value=elapsed)
+            db_queries_per_request.observe(route, value=stats.queries)
+            if stats.queries:
+                db_queries.inc(route, amount=stats.queries)
+                db_query_seconds.inc(route, amount=stats.query_seconds)
+            if stats.password_seconds:
+                password_hash_seconds.inc(route, amount=stats.password_seconds)
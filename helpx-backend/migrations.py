@@ -0,0 +1,311 @@
+import argparse
+import logging
+import os
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, case, insert, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from database import Base
+from models import User, Skill, Booking, ProviderStats, SkillStats, TableVersion
+import availability
+import response_cache
+import search
+import stats
+
+logger = logging.getLogger(__name__)
+
+ADVISORY_LOCK_ID = 4815162342
+
+VERSIONS = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def migrate_on_startup() -> bool:
+    return os.getenv("MIGRATE_ON_STARTUP", "true").strip().lower() in ("1", "true", "yes", "on")
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection, bool], None]
+    transactional: bool = True
+
+def _index(table: Table, name: str) -> Index:
+    return next(index for index in table.indexes if index.name == name)
+
+def create_index(conn: Connection, index: Index, concurrently: bool = False) -> None:
+    if conn.dialect.name not in ("postgresql", "sqlite"):
+        index.create(conn, checkfirst=True)
+        return
+    if not concurrently or conn.dialect.name != "postgresql":
+        conn.execute(CreateIndex(index, if_not_exists=True))
+        return
+    valid = conn.execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": index.name}
+    ).scalar()
+    if valid is False:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    conn.execute(text(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)))
+
+def _initial_schema(conn: Connection, concurrently: bool) -> None:
+    for table in (User.__table__, Skill.__table__, Booking.__table__):
+        table.create(conn, checkfirst=True)
+
+def _search_index(conn: Connection, concurrently: bool) -> None:
+    search.create_search_index(conn)
+
+def _query_indexes(conn: Connection, concurrently: bool) -> None:
+    for index in (
+        _index(Skill.__table__, "ix_skills_user_id_id"),
+        _index(Booking.__table__, "ix_bookings_customer_id_id"),
+        _index(Booking.__table__, "ix_bookings_provider_id_id"),
+        _index(Booking.__table__, "ix_bookings_provider_id_status_booking_date"),
+        _index(Booking.__table__, "ix_bookings_skill_id"),
+    ):
+        create_index(conn, index, concurrently)
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        conn.execute(text("ANALYZE skills"))
+        conn.execute(text("ANALYZE bookings"))
+
+def has_overlap_constraint(conn: Connection) -> bool:
+    return conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": availability.OVERLAP_CONSTRAINT}).first() is not None
+
+def _booking_overlap_constraint(conn: Connection, concurrently: bool) -> None:
+    if conn.dialect.name != "postgresql" or has_overlap_constraint(conn):
+        return
+    conflicts = availability.find_conflicts(conn)
+    if conflicts:
+        logger.warning("Overlapping bookings found; the no-overlap constraint was not added", extra={
+            "event": "migration.overlaps",
+            "conflicts": len(conflicts),
+            "pairs": conflicts[:20],
+            "fix": "python migrations.py overlaps --cancel",
+        })
+        return
+    add_overlap_constraint(conn)
+
+def add_overlap_constraint(conn: Connection) -> None:
+    statuses = ", ".join(f"'{status}'" for status in availability.BLOCKING_STATUSES)
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+    conn.execute(text(
+        f"ALTER TABLE bookings ADD CONSTRAINT {availability.OVERLAP_CONSTRAINT} EXCLUDE USING gist ("
+        f"provider_id WITH =, tsrange(booking_date, booking_date + duration_hours * interval '1 hour') WITH &&"
+        f") WHERE (booking_date IS NOT NULL AND status IN ({statuses}))"
+    ))
+
+def _booking_version(conn: Connection, concurrently: bool) -> None:
+    if "version" not in {column["name"] for column in inspect(conn).get_columns("bookings")}:
+        conn.execute(text("ALTER TABLE bookings ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+def _booking_listing_indexes(conn: Connection, concurrently: bool) -> None:
+    for name in (
+        "ix_bookings_customer_id_scheduled_at",
+        "ix_bookings_provider_id_scheduled_at",
+        "ix_bookings_customer_id_created_at",
+        "ix_bookings_provider_id_created_at",
+    ):
+        create_index(conn, _index(Booking.__table__, name), concurrently)
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        conn.execute(text("ANALYZE bookings"))
+
+def _booking_stats(conn: Connection, concurrently: bool) -> None:
+    if "previous_status" not in {column["name"] for column in inspect(conn).get_columns("bookings")}:
+        conn.execute(text("ALTER TABLE bookings ADD COLUMN previous_status VARCHAR(20)"))
+    for table in (ProviderStats.__table__, SkillStats.__table__):
+        table.create(conn, checkfirst=True)
+    stats.rebuild(conn)
+
+def _table_versions(conn: Connection, concurrently: bool) -> None:
+    TableVersion.__table__.create(conn, checkfirst=True)
+    existing = set(conn.execute(select(TableVersion.name)).scalars())
+    missing = [{"name": name, "version": 0} for name in response_cache.CACHED_TABLES if name not in existing]
+    if missing:
+        conn.execute(insert(TableVersion), missing)
+
+def _booking_duration_limit(conn: Connection, concurrently: bool) -> None:
+    if conn.dialect.name not in ("postgresql", "sqlite") or availability.has_duration_constraint(conn):
+        return
+    invalid = availability.invalid_durations(conn)
+    if invalid:
+        logger.warning("Bookings outside the duration limit found; the duration constraint was not added", extra={
+            "event": "migration.long_bookings",
+            "bookings": len(invalid),
+            "ids": invalid[:20],
+            "max_hours": availability.MAX_BOOKING_HOURS,
+            "fix": "python migrations.py durations --clamp",
+        })
+        return
+    availability.add_duration_constraint(conn)
+
+def _fuzzy_search_index(conn: Connection, concurrently: bool) -> None:
+    search.create_search_index(conn)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "skill search index", _search_index),
+    Migration(3, "indexes for skill and booking queries", _query_indexes, transactional=False),
+    Migration(4, "no overlapping accepted bookings per provider", _booking_overlap_constraint),
+    Migration(5, "booking version column", _booking_version),
+    Migration(6, "indexes for sorted booking listings", _booking_listing_indexes, transactional=False),
+    Migration(7, "booking statistics tables", _booking_stats),
+    Migration(8, "table versions for the response cache", _table_versions),
+    Migration(9, "skill search vocabulary and prefix indexes", _fuzzy_search_index),
+    Migration(10, "booking duration limit", _booking_duration_limit),
+]
+
+def applied_versions(conn: Connection) -> Set[int]:
+    return set(conn.execute(select(VERSIONS.c.version)).scalars())
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(insert(VERSIONS).values(version=migration.version, name=migration.name, applied_at=datetime.utcnow()))
+
+def _apply(engine: Engine, migration: Migration, concurrently: bool) -> None:
+    if migration.transactional or not concurrently or engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            migration.apply(conn, False)
+            _record(conn, migration)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration.apply(conn, True)
+        _record(conn, migration)
+
+def upgrade(engine: Engine, target: Optional[int] = None, concurrently: bool = False) -> List[int]:
+    VERSIONS.create(bind=engine, checkfirst=True)
+    with engine.connect() as lock:
+        if engine.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock.commit()
+        try:
+            with engine.connect() as conn:
+                done = applied_versions(conn)
+            applied = []
+            for migration in MIGRATIONS:
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                logger.info("Applying migration", extra={"event": "migration.apply", "version": migration.version, "migration": migration.name})
+                _apply(engine, migration, concurrently)
+                applied.append(migration.version)
+            return applied
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+                lock.commit()
+
+def current_version(engine: Engine) -> int:
+    VERSIONS.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return max(applied_versions(conn), default=0)
+
+def resolve_overlaps(conn: Connection) -> List[int]:
+    cancelled: List[int] = []
+    seen: Set[int] = set()
+    for first, second in availability.find_conflicts(conn):
+        if first not in seen and second not in seen:
+            seen.add(second)
+            cancelled.append(second)
+    for start in range(0, len(cancelled), 1000):
+        conn.execute(
+            update(Booking)
+            .where(Booking.id.in_(cancelled[start:start + 1000]))
+            .values(status="cancelled", previous_status=Booking.status, version=Booking.version + 1, updated_at=datetime.utcnow())
+        )
+    if cancelled and inspect(conn).has_table(ProviderStats.__tablename__):
+        stats.rebuild(conn)
+    return cancelled
+
+def clamp_durations(conn: Connection) -> List[int]:
+    invalid = availability.invalid_durations(conn)
+    for start in range(0, len(invalid), 1000):
+        conn.execute(
+            update(Booking)
+            .where(Booking.id.in_(invalid[start:start + 1000]))
+            .values(
+                duration_hours=case(
+                    (Booking.duration_hours < 1, 1),
+                    else_=availability.MAX_BOOKING_HOURS
+                ),
+                version=Booking.version + 1,
+                updated_at=datetime.utcnow()
+            )
+        )
+    if invalid and inspect(conn).has_table(ProviderStats.__tablename__):
+        stats.rebuild(conn)
+    return invalid
+
+def reset(engine: Engine) -> None:
+    with engine.begin() as conn:
+        search.drop_search_index(conn)
+    Base.metadata.drop_all(bind=engine)
+    VERSIONS.drop(bind=engine, checkfirst=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply HelpX schema migrations")
+    parser.add_argument("command", choices=["upgrade", "status", "overlaps", "durations"], nargs="?", default="upgrade")
+    parser.add_argument("--to", type=int, default=None, help="Stop after this version")
+    parser.add_argument("--concurrently", action="store_true", help="Build indexes with CREATE INDEX CONCURRENTLY (PostgreSQL) so a live database keeps taking writes")
+    parser.add_argument("--cancel", action="store_true", help="overlaps: cancel the newer booking of each overlapping pair, then add the no-overlap constraint")
+    parser.add_argument("--clamp", action="store_true", help="durations: clamp duration_hours into 1..MAX_BOOKING_HOURS, then add the duration constraint")
+    args = parser.parse_args()
+
+    from database import engine
+
+    if args.command == "status":
+        VERSIONS.create(bind=engine, checkfirst=True)
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+        for migration in MIGRATIONS:
+            print(f"{migration.version:4d}  {'applied' if migration.version in done else 'pending':8s} {migration.name}")
+        if engine.dialect.name == "postgresql" and 4 in done:
+            with engine.connect() as conn:
+                if not has_overlap_constraint(conn):
+                    print("warning: the no-overlap constraint is missing; run 'python migrations.py overlaps'")
+        if 10 in done:
+            with engine.connect() as conn:
+                if not availability.has_duration_constraint(conn):
+                    print("warning: the booking duration constraint is missing; run 'python migrations.py durations'")
+        return
+
+    if args.command == "overlaps":
+        with engine.begin() as conn:
+            conflicts = availability.find_conflicts(conn)
+            for first, second in conflicts:
+                print(f"booking {second} overlaps booking {first}")
+            if args.cancel:
+                cancelled = resolve_overlaps(conn)
+                print(f"Cancelled bookings: {cancelled}" if cancelled else "No overlapping bookings")
+                if conn.dialect.name == "postgresql" and not has_overlap_constraint(conn):
+                    add_overlap_constraint(conn)
+                    print(f"Added constraint {availability.OVERLAP_CONSTRAINT}")
+            else:
+                print(f"{len(conflicts)} overlapping pairs" + ("; rerun with --cancel to cancel the newer booking of each" if conflicts else ""))
+        return
+
+    if args.command == "durations":
+        with engine.begin() as conn:
+            invalid = availability.invalid_durations(conn)
+            for booking_id in invalid:
+                print(f"booking {booking_id} is outside 1..{availability.MAX_BOOKING_HOURS} hours")
+            if args.clamp:
+                clamped = clamp_durations(conn)
+                print(f"Clamped bookings: {clamped}" if clamped else "No bookings outside the limit")
+                if not availability.has_duration_constraint(conn):
+                    availability.add_duration_constraint(conn)
+                    print(f"Added constraint {availability.DURATION_CONSTRAINT}")
+            else:
+                print(f"{len(invalid)} bookings outside the limit" + ("; rerun with --clamp to clamp them" if invalid else ""))
+        return
+
+    applied = upgrade(engine, target=args.to, concurrently=args.concurrently)
+    print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+    print(f"Schema version: {current_version(engine)}")
+
+if __name__ == "__main__":
+    main()
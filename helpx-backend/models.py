@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Enum, Index, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -35,6 +36,9 @@ class User(Base):
 
 class Skill(Base):
     __tablename__ = "skills"
+    __table_args__ = (
+        Index("ix_skills_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     skill = Column(String(100), nullable=False)
@@ -56,6 +60,12 @@ class Skill(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_customer_id_id", "customer_id", "id"),
+        Index("ix_bookings_provider_id_id", "provider_id", "id"),
+        Index("ix_bookings_provider_id_status_booking_date", "provider_id", "status", "booking_date"),
+        Index("ix_bookings_skill_id", "skill_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -67,11 +77,21 @@ class Booking(Base):
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    previous_status = Column(String(20), nullable=True)
     
     customer = relationship("User", foreign_keys=[customer_id], back_populates="bookings_as_customer")
     provider = relationship("User", foreign_keys=[provider_id], back_populates="bookings_as_provider")
     skill = relationship("Skill", back_populates="bookings")
     
+    @hybrid_property
+    def scheduled_at(self):
+        return self.booking_date or self.created_at
+    
+    @scheduled_at.expression
+    def scheduled_at(cls):
+        return func.coalesce(cls.booking_date, cls.created_at)
+    
     def to_dict(self):
         return {
             "id": self.id,
@@ -82,9 +102,57 @@ class Booking(Base):
             "skill_id": self.skill_id,
             "skill_name": self.skill.skill if self.skill else None,
             "status": self.status,
-            "booking_date": self.booking_date.isoformat() if self.booking_date else None,
+            "booking_date": self.booking_date,
             "duration_hours": self.duration_hours,
             "notes": self.notes,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "version": self.version
+        }
+
+Index("ix_bookings_customer_id_scheduled_at", Booking.customer_id, Booking.scheduled_at, Booking.id)
+Index("ix_bookings_provider_id_scheduled_at", Booking.provider_id, Booking.scheduled_at, Booking.id)
+Index("ix_bookings_customer_id_created_at", Booking.customer_id, Booking.created_at, Booking.id)
+Index("ix_bookings_provider_id_created_at", Booking.provider_id, Booking.created_at, Booking.id)
+
+class ProviderStats(Base):
+    __tablename__ = "provider_stats"
+    
+    provider_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    pending = Column(Integer, default=0, server_default="0", nullable=False)
+    accepted = Column(Integer, default=0, server_default="0", nullable=False)
+    completed = Column(Integer, default=0, server_default="0", nullable=False)
+    cancelled = Column(Integer, default=0, server_default="0", nullable=False)
+    hours_booked = Column(Integer, default=0, server_default="0", nullable=False)
+    hours_completed = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    def to_dict(self):
+        return {
+            "provider_id": self.provider_id,
+            "bookings": {
+                "pending": self.pending,
+                "accepted": self.accepted,
+                "completed": self.completed,
+                "cancelled": self.cancelled
+            },
+            "total": self.pending + self.accepted + self.completed + self.cancelled,
+            "hours_booked": self.hours_booked,
+            "hours_completed": self.hours_completed
         }
+
+class SkillStats(Base):
+    __tablename__ = "skill_stats"
+    __table_args__ = (
+        Index("ix_skill_stats_bookings_skill_id", "bookings", "skill_id"),
+    )
+    
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    bookings = Column(Integer, default=0, server_default="0", nullable=False)
+    completed = Column(Integer, default=0, server_default="0", nullable=False)
+    hours_booked = Column(Integer, default=0, server_default="0", nullable=False)
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, server_default="0", nullable=False)
@@ -0,0 +1,181 @@
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import Boolean, Column, Float, MetaData, String, Table, case, delete, func
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import metrics
+from passwords import PASSWORD_HASH_WORKERS
+
+DEFAULT_RATE_LIMITS = "login.ip=20/60,login.email=5/300,register.ip=10/3600,add-user.ip=10/3600,firebase-session.ip=30/60"
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").strip().lower() in ("1", "true", "yes", "on")
+RATE_LIMIT_PRUNE_EVERY = 1000
+RATE_LIMIT_STATE_SECONDS = 86400
+AUTH_MAX_CONCURRENT = int(os.getenv("AUTH_MAX_CONCURRENT", str(max(PASSWORD_HASH_WORKERS, 1) * 4)))
+AUTH_SHED_RETRY_AFTER = int(os.getenv("AUTH_SHED_RETRY_AFTER", "1"))
+
+BUCKETS = Table(
+    "rate_limit_buckets",
+    MetaData(),
+    Column("key", String(255), primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+    Column("granted", Boolean, nullable=False),
+)
+
+class RateLimited(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: int = AUTH_SHED_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def parse_limits(spec: str) -> Dict[Tuple[str, str], Optional[Tuple[int, float]]]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        route, _, scope = name.strip().partition(".")
+        if value.strip() == "off":
+            limits[(route, scope)] = None
+            continue
+        capacity, _, seconds = value.partition("/")
+        limits[(route, scope)] = (int(capacity), float(seconds))
+    return limits
+
+LIMITS = {**parse_limits(DEFAULT_RATE_LIMITS), **parse_limits(os.getenv("RATE_LIMITS", ""))}
+
+class Backend(ABC):
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        ...
+
+class MemoryBackend(Backend):
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if tokens >= 1 else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return wait
+
+class DatabaseBackend(Backend):
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self._calls = 0
+
+    async def start(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(BUCKETS.create, checkfirst=True)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            smaller = func.least
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            smaller = func.min
+        else:
+            raise ValueError(f"RATE_LIMIT_BACKEND=database needs PostgreSQL or SQLite, not {dialect}")
+
+        now = time.time()
+        refilled = smaller(capacity, BUCKETS.c.tokens + (now - BUCKETS.c.updated_at) * rate)
+        statement = dialect_insert(BUCKETS).values(key=key, tokens=capacity - 1, updated_at=now, granted=True)
+        statement = statement.on_conflict_do_update(
+            index_elements=[BUCKETS.c.key],
+            set_={
+                "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                "updated_at": now,
+                "granted": refilled >= 1,
+            }
+        ).returning(BUCKETS.c.tokens, BUCKETS.c.granted)
+
+        async with self.engine.begin() as conn:
+            tokens, granted = (await conn.execute(statement)).one()
+            self._calls += 1
+            if self._calls % RATE_LIMIT_PRUNE_EVERY == 0:
+                await conn.execute(delete(BUCKETS).where(BUCKETS.c.updated_at < now - RATE_LIMIT_STATE_SECONDS))
+        return 0.0 if granted else (1 - tokens) / rate
+
+def create_backend(backend: str = RATE_LIMIT_BACKEND) -> Backend:
+    if backend == "database":
+        from database import async_engine
+
+        return DatabaseBackend(async_engine)
+    if backend == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r}; use 'memory' or 'database'")
+
+backend = create_backend()
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+def in_flight() -> int:
+    return _in_flight
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+async def check(route: str, scope: str, value: str) -> None:
+    limit = LIMITS.get((route, scope))
+    if limit is None or not RATE_LIMIT_ENABLED:
+        return
+    capacity, seconds = limit
+    wait = await backend.take(f"{route}:{scope}:{value}", capacity, capacity / seconds)
+    if wait > 0:
+        metrics.rate_limited.inc(route, scope)
+        raise RateLimited("Too many attempts, try again later", math.ceil(wait))
+
+class Guard:
+    def __init__(self, route: str):
+        self.route = route
+
+    async def limit_email(self, email: str) -> None:
+        await check(self.route, "email", email.strip().lower())
+
+def guard(route: str):
+    async def dependency(request: Request):
+        global _in_flight
+        await check(route, "ip", client_ip(request))
+        with _in_flight_lock:
+            if _in_flight >= AUTH_MAX_CONCURRENT:
+                metrics.admission_shed.inc(route)
+                raise Overloaded("The server is busy, try again shortly")
+            _in_flight += 1
+        try:
+            yield Guard(route)
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+    return dependency
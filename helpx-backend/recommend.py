@@ -0,0 +1,265 @@
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from models import Booking, Skill
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECOMMEND_LIMIT = 10
+MAX_RECOMMEND_LIMIT = 100
+RECOMMEND_SCAN_LIMIT = int(os.getenv("RECOMMEND_SCAN_LIMIT", "0"))
+RECOMMEND_BOOKING_WEIGHT = float(os.getenv("RECOMMEND_BOOKING_WEIGHT", "0.1"))
+RECOMMEND_HISTORY = int(os.getenv("RECOMMEND_HISTORY", "20"))
+RECOMMEND_STATS_TTL = float(os.getenv("RECOMMEND_STATS_TTL", "300"))
+RECOMMEND_SYNC_SECONDS = float(os.getenv("RECOMMEND_SYNC_SECONDS", "30"))
+RECOMMEND_WAIT_SECONDS = float(os.getenv("RECOMMEND_WAIT_SECONDS", "2"))
+RECOMMEND_PREWARM = os.getenv("RECOMMEND_PREWARM", "true").strip().lower() in ("1", "true", "yes", "on")
+BUILD_BATCH_SIZE = 10000
+
+BOOKED_STATUSES = ("accepted", "completed")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from i in is it me my of on or our the to we with you your".split()
+)
+
+_WORD = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+
+Vector = Dict[str, float]
+
+class IndexWarming(Exception):
+    pass
+
+def skill_terms(skill: str, description: Optional[str]) -> Counter:
+    return Counter(word for word in _WORD.findall(f"{skill} {description or ''}".lower()) if word not in STOP_WORDS)
+
+def vectorize(counts: Counter) -> Vector:
+    weights = {term: 1 + math.log(count) for term, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+def combine(vectors: Iterable[Vector]) -> Vector:
+    total: Dict[str, float] = defaultdict(float)
+    for vector in vectors:
+        for term, weight in vector.items():
+            total[term] += weight
+    norm = math.sqrt(sum(weight * weight for weight in total.values()))
+    return {term: weight / norm for term, weight in total.items()} if norm else {}
+
+class SkillIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._building = False
+        self._pending: List[dict] = []
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._unsorted: Set[str] = set()
+        self._owners = array("l")
+        self.size = 0
+        self.max_id = 0
+        self.synced_at = 0.0
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        return self._ready.wait(timeout)
+
+    def _grow(self, owners: array, skill_id: int) -> None:
+        if skill_id >= len(owners):
+            owners.extend(array("l", bytes(owners.itemsize * max(skill_id + 1 - len(owners), len(owners)))))
+
+    def load(self, rows: Iterable[dict]) -> None:
+        lists: Dict[str, list] = defaultdict(list)
+        owners = array("l")
+        size = max_id = 0
+        for row in rows:
+            self._grow(owners, row["id"])
+            if owners[row["id"]]:
+                continue
+            owners[row["id"]] = row["user_id"]
+            for term, weight in vectorize(skill_terms(row["skill"], row.get("description"))).items():
+                lists[term].append((-weight, row["id"]))
+            size += 1
+            max_id = max(max_id, row["id"])
+        postings = {}
+        for term, items in lists.items():
+            items.sort()
+            postings[term] = (array("f", [key for key, _ in items]), array("l", [skill_id for _, skill_id in items]))
+        with self._lock:
+            self._postings, self._owners, self.size, self.max_id = postings, owners, size, max_id
+            self._unsorted = set()
+            pending, self._pending = self._pending, []
+            for row in pending:
+                self._add(row)
+            self._building = False
+            self.synced_at = time.monotonic()
+            self._ready.set()
+
+    def _add(self, row: dict) -> None:
+        skill_id = row["id"]
+        self._grow(self._owners, skill_id)
+        if self._owners[skill_id]:
+            return
+        self._owners[skill_id] = row["user_id"]
+        for term, weight in vectorize(skill_terms(row["skill"], row.get("description"))).items():
+            keys, ids = self._postings.setdefault(term, (array("f"), array("l")))
+            keys.append(-weight)
+            ids.append(skill_id)
+            self._unsorted.add(term)
+        self.size += 1
+        self.max_id = max(self.max_id, skill_id)
+
+    def _sorted(self, term: str) -> Tuple[array, array]:
+        keys, ids = self._postings[term]
+        if term in self._unsorted:
+            items = sorted(zip(keys, ids))
+            keys, ids = array("f", [key for key, _ in items]), array("l", [skill_id for _, skill_id in items])
+            self._postings[term] = keys, ids
+            self._unsorted.discard(term)
+        return keys, ids
+
+    def add(self, rows: Iterable[dict]) -> None:
+        with self._lock:
+            if self._building:
+                self._pending.extend(rows)
+            elif self._ready.is_set():
+                for row in rows:
+                    self._add(row)
+
+    def start_building(self) -> bool:
+        with self._lock:
+            if self._building or self._ready.is_set():
+                return False
+            self._building = True
+            return True
+
+    def owner(self, skill_id: int) -> int:
+        return self._owners[skill_id] if skill_id < len(self._owners) else 0
+
+    def idf(self, document_frequency: int) -> float:
+        return math.log((self.size + 1) / (document_frequency + 1)) + 1
+
+    def query(
+        self,
+        vector: Vector,
+        limit: int,
+        exclude: Set[int] = frozenset(),
+        exclude_owner: Optional[int] = None,
+        boosts: Optional[Dict[int, int]] = None
+    ) -> List[Tuple[int, float]]:
+        with self._lock:
+            slices = []
+            for term, weight in vector.items():
+                if term not in self._postings:
+                    continue
+                keys, ids = self._sorted(term) if RECOMMEND_SCAN_LIMIT else self._postings[term]
+                end = RECOMMEND_SCAN_LIMIT or len(ids)
+                slices.append((self.idf(len(ids)) ** 2 * weight, keys[:end], ids[:end]))
+
+        scores: Dict[int, float] = {}
+        for factor, keys, ids in slices:
+            for key, skill_id in zip(keys, ids):
+                scores[skill_id] = scores.get(skill_id, 0.0) - key * factor
+
+        boosts = boosts or {}
+        ranked = []
+        for skill_id, score in heapq.nlargest(limit * 5 + len(exclude), scores.items(), key=lambda item: item[1]):
+            owner = self.owner(skill_id)
+            if skill_id in exclude or (exclude_owner is not None and owner == exclude_owner):
+                continue
+            ranked.append((skill_id, score * (1 + RECOMMEND_BOOKING_WEIGHT * math.log1p(boosts.get(owner, 0)))))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+index = SkillIndex()
+_provider_bookings = TTLCache(1, RECOMMEND_STATS_TTL)
+
+def _skill_rows(db: Session, after: int = 0) -> Iterable[dict]:
+    query = select(Skill.id, Skill.skill, Skill.description, Skill.user_id).where(Skill.id > after).order_by(Skill.id)
+    for row in db.execute(query.execution_options(yield_per=BUILD_BATCH_SIZE)):
+        yield row._asdict()
+
+def _build() -> None:
+    from database import SessionLocal
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        index.load(_skill_rows(db))
+    except Exception:
+        with index._lock:
+            index._building = False
+        logger.exception("Recommendation index build failed", extra={"event": "recommend.build_failed"})
+        return
+    finally:
+        db.close()
+    logger.info("Recommendation index built", extra={
+        "event": "recommend.built", "skills": index.size, "terms": len(index._postings), "seconds": round(time.perf_counter() - started, 3)
+    })
+
+def start_build() -> None:
+    if index.start_building():
+        threading.Thread(target=_build, name="recommend-index", daemon=True).start()
+
+def add_skills(skills: Iterable[dict]) -> None:
+    index.add(skills)
+
+def sync(db: Session) -> None:
+    if not index.is_ready():
+        start_build()
+        raise IndexWarming("The recommendation index is still loading")
+    if time.monotonic() - index.synced_at < RECOMMEND_SYNC_SECONDS:
+        return
+    index.synced_at = time.monotonic()
+    index.add(list(_skill_rows(db, index.max_id)))
+
+def provider_bookings(db: Session) -> Dict[int, int]:
+    counts = _provider_bookings.get("providers")
+    if counts is None:
+        query = select(Booking.provider_id, func.count()).where(Booking.status.in_(BOOKED_STATUSES)).group_by(Booking.provider_id)
+        counts = {provider_id: count for provider_id, count in db.execute(query)}
+        _provider_bookings.set("providers", counts)
+    return counts
+
+def similar_skills(db: Session, skill: Skill, limit: int) -> List[Tuple[int, float]]:
+    sync(db)
+    vector = vectorize(skill_terms(skill.skill, skill.description))
+    return index.query(vector, limit, exclude={skill.id}, boosts=provider_bookings(db))
+
+def recommend_for_user(db: Session, user_id: int, limit: int) -> List[Tuple[int, float]]:
+    sync(db)
+    history = db.execute(
+        select(Skill.id, Skill.skill, Skill.description)
+        .join(Booking, Booking.skill_id == Skill.id)
+        .where(Booking.customer_id == user_id)
+        .order_by(Booking.id.desc())
+        .limit(RECOMMEND_HISTORY)
+    ).all()
+    boosts = provider_bookings(db)
+    if not history:
+        return _popular(db, user_id, limit, boosts)
+    vector = combine(vectorize(skill_terms(row.skill, row.description)) for row in history)
+    return index.query(vector, limit, exclude={row.id for row in history}, exclude_owner=user_id, boosts=boosts)
+
+def _popular(db: Session, user_id: int, limit: int, boosts: Dict[int, int]) -> List[Tuple[int, float]]:
+    providers = [provider_id for provider_id in heapq.nlargest(limit * 2, boosts, key=boosts.get) if provider_id != user_id]
+    if not providers:
+        return []
+    rows = db.execute(select(Skill.id, Skill.user_id).where(Skill.user_id.in_(providers)).order_by(Skill.id)).all()
+    ranked = [(row.id, RECOMMEND_BOOKING_WEIGHT * math.log1p(boosts[row.user_id])) for row in rows]
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked[:limit]
+
+def stats() -> dict:
+    return {"ready": index.is_ready(), "skills": index.size, "terms": len(index._postings), "max_id": index.max_id}
@@ -1,13 +1,15 @@
-from database import Base, engine
-from models import User, Skill
+from database import engine
+import migrations
 
 print("Dropping all tables...")
-Base.metadata.drop_all(bind=engine)
+migrations.reset(engine)
 
 print("Creating all tables with new schema...")
-Base.metadata.create_all(bind=engine)
+migrations.upgrade(engine)
 
 print("✅ Tables recreated successfully!")
-print("\nTables created:")
-print("- users (id, name, email, hashed_password)")
+print(f"\nSchema version: {migrations.current_version(engine)}")
+print("Tables created:")
+print("- users (id, name, email, hashed_password, bio)")
 print("- skills (id, skill, description, user_id)")
+print("- bookings (id, customer_id, provider_id, skill_id, status, booking_date, ...)")
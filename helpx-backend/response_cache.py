@@ -0,0 +1,76 @@
+import hashlib
+import os
+from typing import Hashable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from cache import TTLCache
+from models import TableVersion
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_VERSION_TTL = float(os.getenv("RESPONSE_CACHE_VERSION_TTL", "1"))
+CACHE_CONTROL = "no-cache"
+CACHED_TABLES = ("users", "skills")
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+responses = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+_versions = TTLCache(64, RESPONSE_CACHE_VERSION_TTL)
+
+def bump(db, *tables: str) -> None:
+    tables = tuple(table for table in tables if table in CACHED_TABLES)
+    if not tables:
+        return
+    statement = update(TableVersion).where(TableVersion.name.in_(tables)).values(version=TableVersion.version + 1)
+    if isinstance(db, Session):
+        db.execute(statement)
+        db.commit()
+    else:
+        with db.begin() as conn:
+            conn.execute(statement)
+    _versions.clear()
+
+def load_versions(db, tables: Tuple[str, ...], reuse: bool = True) -> Tuple[int, ...]:
+    cached = _versions.get(tables) if reuse else None
+    if cached is None:
+        stored = dict(db.execute(select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))).all())
+        cached = tuple(stored.get(table, 0) for table in tables)
+        _versions.set(tables, cached)
+    return cached
+
+def cache_key(request: Request, versions: Tuple[int, ...]) -> Hashable:
+    return request.url.path, tuple(sorted(request.query_params.multi_items())), versions
+
+def get(key: Hashable) -> Optional[CachedResponse]:
+    return responses.get(key)
+
+def store(key: Hashable, body: bytes) -> CachedResponse:
+    entry = CachedResponse(f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+    responses.set(key, entry)
+    return entry
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+def respond(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if not_modified(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+def clear() -> None:
+    responses.clear()
+
+def cache_stats() -> dict:
+    return responses.stats()
@@ -0,0 +1,195 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+class UserOut(BaseModel):
+    id: int
+    name: str
+    email: str
+    bio: Optional[str] = None
+
+class SkillOut(BaseModel):
+    id: int
+    skill: str
+    description: Optional[str] = None
+    user_id: int
+    user_name: Optional[str] = None
+
+class ScoredSkillOut(SkillOut):
+    score: float
+
+class BookingOut(BaseModel):
+    id: int
+    customer_id: int
+    customer_name: Optional[str] = None
+    provider_id: int
+    provider_name: Optional[str] = None
+    skill_id: int
+    skill_name: Optional[str] = None
+    status: str
+    booking_date: Optional[datetime] = None
+    duration_hours: int
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int
+
+class Token(BaseModel):
+    message: str
+    success: bool
+    access_token: str
+    token_type: str
+    user: UserOut
+
+class UserDetail(BaseModel):
+    success: bool
+    user: UserOut
+
+class UserResponse(UserDetail):
+    message: str
+
+class UsersPage(BaseModel):
+    success: bool
+    count: int
+    users: List[UserOut]
+    next_cursor: Optional[int] = None
+
+class SkillResponse(BaseModel):
+    success: bool
+    message: str
+    skill: SkillOut
+
+class SkillsPage(BaseModel):
+    success: bool
+    count: int
+    skills: List[SkillOut]
+    next_cursor: Optional[int] = None
+
+class SkillSearchResponse(BaseModel):
+    success: bool
+    query: str
+    count: int
+    skills: List[ScoredSkillOut]
+
+class SimilarSkillsResponse(BaseModel):
+    success: bool
+    skill_id: int
+    count: int
+    skills: List[ScoredSkillOut]
+
+class RecommendationsResponse(BaseModel):
+    success: bool
+    user_id: int
+    count: int
+    skills: List[ScoredSkillOut]
+
+class SkillBatchItem(BaseModel):
+    index: int
+    success: bool
+    skill: SkillOut
+
+class SkillBatchResponse(BaseModel):
+    success: bool
+    message: str
+    created: int
+    results: List[SkillBatchItem]
+
+class BookingDetail(BaseModel):
+    success: bool
+    booking: BookingOut
+
+class BookingResponse(BookingDetail):
+    message: str
+
+class BookingBatchItem(BaseModel):
+    index: int
+    success: bool
+    error: Optional[str] = None
+    booking: Optional[BookingOut] = None
+
+class BookingBatchResponse(BaseModel):
+    success: bool
+    message: str
+    created: int
+    failed: int
+    results: List[BookingBatchItem]
+
+class BookingSummary(BaseModel):
+    pending: int = 0
+    accepted: int = 0
+    completed: int = 0
+    cancelled: int = 0
+
+class BookingsPage(BaseModel):
+    success: bool
+    count: int
+    bookings: List[BookingOut]
+    next_cursor: Optional[Union[int, str]] = None
+    summary: Optional[BookingSummary] = None
+
+class ProviderStatsResponse(BaseModel):
+    success: bool
+    provider_id: int
+    bookings: BookingSummary
+    total: int
+    hours_booked: int
+    hours_completed: int
+
+class TopSkill(BaseModel):
+    skill_id: int
+    skill: str
+    user_id: int
+    user_name: str
+    bookings: int
+    completed: int
+    hours_booked: int
+
+class TopSkillsResponse(BaseModel):
+    success: bool
+    count: int
+    skills: List[TopSkill]
+
+class Interval(BaseModel):
+    start: datetime
+    end: datetime
+
+class AvailabilityResponse(BaseModel):
+    success: bool
+    provider_id: int
+    start: datetime = Field(..., alias="from")
+    end: datetime = Field(..., alias="to")
+    free: List[Interval]
+    busy: List[Interval]
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+class CacheStatsResponse(BaseModel):
+    success: bool
+    auth: Dict[str, CacheStats]
+    firebase: Dict[str, CacheStats]
+    availability: CacheStats
+    responses: CacheStats
+
+class PoolStatusResponse(BaseModel):
+    success: bool
+    sync: Dict[str, Any]
+    async_: Dict[str, Any] = Field(..., alias="async")
+    replicas: List[Dict[str, Any]] = []
+    config: Dict[str, Any]
+
+class FirebaseProjectResponse(BaseModel):
+    success: bool
+    project_id: Optional[str] = None
+
+class RootResponse(BaseModel):
+    message: str
+    docs: str
+    endpoints: Dict[str, str]
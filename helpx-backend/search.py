@@ -0,0 +1,182 @@
+import bisect
+import os
+import re
+import string
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from models import Skill
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SEARCH_VOCABULARY_TTL = float(os.getenv("SEARCH_VOCABULARY_TTL", "60"))
+SEARCH_MAX_CORRECTIONS = int(os.getenv("SEARCH_MAX_CORRECTIONS", "5"))
+MIN_FUZZY_WORD = 4
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_PG_TEXT = "(skill || ' ' || coalesce(description, ''))"
+_PG_DOCUMENT = f"to_tsvector('english', {_PG_TEXT})"
+
+_vocabularies = TTLCache(16, SEARCH_VOCABULARY_TTL)
+
+def ensure_search_index(engine: Engine) -> None:
+    with engine.begin() as conn:
+        create_search_index(conn)
+
+def create_search_index(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_skills_search_tsv ON skills USING gin ({_PG_DOCUMENT})"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_skills_skill_trgm ON skills USING gin (skill gin_trgm_ops)"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_skills_text_trgm ON skills USING gin ({_PG_TEXT} gin_trgm_ops)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_skills_skill_prefix ON skills (lower(skill) text_pattern_ops)"))
+    elif conn.dialect.name == "sqlite":
+        tables = set(conn.execute(text("SELECT name FROM sqlite_master WHERE name IN ('skills_fts', 'skills_words')")).scalars())
+        if "skills_fts" not in tables:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE skills_fts USING fts5("
+                "skill, description, content='skills', content_rowid='id', tokenize='trigram')"
+            ))
+            conn.execute(text("INSERT INTO skills_fts(skills_fts) VALUES ('rebuild')"))
+        if "skills_words" not in tables:
+            conn.execute(text("CREATE VIRTUAL TABLE skills_words USING fts5(skill, description, content='', detail=none)"))
+            conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS skills_words_vocab USING fts5vocab(skills_words, 'row')"))
+            conn.execute(text("INSERT INTO skills_words(rowid, skill, description) SELECT id, skill, coalesce(description, '') FROM skills"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_skills_skill_prefix ON skills (lower(skill))"))
+
+def drop_search_index(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("DROP INDEX IF EXISTS ix_skills_search_tsv"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_skills_skill_trgm"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_skills_text_trgm"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_skills_skill_prefix"))
+    elif conn.dialect.name == "sqlite":
+        conn.execute(text("DROP TABLE IF EXISTS skills_fts"))
+        conn.execute(text("DROP TABLE IF EXISTS skills_words_vocab"))
+        conn.execute(text("DROP TABLE IF EXISTS skills_words"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_skills_skill_prefix"))
+
+def rebuild_index(engine: Engine) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO skills_fts(skills_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO skills_words(skills_words) VALUES ('delete-all')"))
+        conn.execute(text("INSERT INTO skills_words(rowid, skill, description) SELECT id, skill, coalesce(description, '') FROM skills"))
+    _vocabularies.clear()
+
+def index_skills(db: Session, skills: List[dict]) -> None:
+    if not skills or db.get_bind().dialect.name != "sqlite":
+        return
+    rows = [{"id": skill["id"], "skill": skill["skill"], "description": skill.get("description") or ""} for skill in skills]
+    db.execute(text("INSERT INTO skills_fts(rowid, skill, description) VALUES (:id, :skill, :description)"), rows)
+    db.execute(text("INSERT INTO skills_words(rowid, skill, description) VALUES (:id, :skill, :description)"), rows)
+
+def index_skill(db: Session, skill: Skill) -> None:
+    index_skills(db, [{"id": skill.id, "skill": skill.skill, "description": skill.description}])
+
+def _vocabulary(db: Session) -> List[str]:
+    key = str(db.get_bind().url)
+    terms = _vocabularies.get(key)
+    if terms is None:
+        terms = sorted(db.execute(text("SELECT term FROM skills_words_vocab")).scalars())
+        _vocabularies.set(key, terms)
+    return terms
+
+def _edits(word: str) -> Set[str]:
+    letters = set(string.ascii_lowercase + string.digits) | set(word)
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    return (
+        {left + right[1:] for left, right in splits if right}
+        | {left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1}
+        | {left + letter + right[1:] for left, right in splits if right for letter in letters}
+        | {left + letter + right for left, right in splits for letter in letters}
+    )
+
+def _known(terms: List[str], word: str) -> bool:
+    index = bisect.bisect_left(terms, word)
+    return index < len(terms) and terms[index].startswith(word)
+
+def corrections(terms: List[str], word: str) -> List[str]:
+    if len(word) < MIN_FUZZY_WORD or _known(terms, word):
+        return []
+    found = []
+    for candidate in sorted(_edits(word)):
+        index = bisect.bisect_left(terms, candidate)
+        if index < len(terms) and terms[index] == candidate:
+            found.append(candidate)
+            if len(found) == SEARCH_MAX_CORRECTIONS:
+                break
+    return found
+
+def _fts5_query(words: List[str], terms: List[str]) -> str:
+    groups = []
+    for word in dict.fromkeys(words):
+        if len(word) < 3:
+            continue
+        variants = [word, *corrections(terms, word)]
+        groups.append("(" + " OR ".join(f'"{variant}"' for variant in variants) + ")")
+    return " OR ".join(groups)
+
+def _prefix_bounds(q: str) -> Optional[Tuple[str, str]]:
+    prefix = q.strip().lower()
+    if not prefix:
+        return None
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def _short_sqlite(db: Session, q: str, limit: int) -> List[Tuple[int, float]]:
+    bounds = _prefix_bounds(q)
+    if bounds is None:
+        return []
+    rows = db.execute(
+        text("SELECT id FROM skills WHERE lower(skill) >= :low AND lower(skill) < :high ORDER BY lower(skill), id LIMIT :limit"),
+        {"low": bounds[0], "high": bounds[1], "limit": limit}
+    )
+    return [(row.id, 1.0) for row in rows]
+
+def _search_sqlite(db: Session, q: str, limit: int) -> List[Tuple[int, float]]:
+    words = _WORD.findall(q.lower())
+    if all(len(word) < 3 for word in words):
+        return _short_sqlite(db, q, limit)
+    rows = db.execute(
+        text(
+            "SELECT rowid, -bm25(skills_fts, 2.0, 1.0) AS score FROM skills_fts "
+            "WHERE skills_fts MATCH :match ORDER BY score DESC, rowid LIMIT :limit"
+        ),
+        {"match": _fts5_query(words, _vocabulary(db)), "limit": limit}
+    )
+    return [(row.rowid, row.score) for row in rows]
+
+def _short_postgres(db: Session, q: str, limit: int) -> List[Tuple[int, float]]:
+    prefix = q.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if not prefix:
+        return []
+    rows = db.execute(
+        text("SELECT id FROM skills WHERE lower(skill) LIKE :prefix ORDER BY lower(skill), id LIMIT :limit"),
+        {"prefix": prefix + "%", "limit": limit}
+    )
+    return [(row.id, 1.0) for row in rows]
+
+def _search_postgres(db: Session, q: str, limit: int) -> List[Tuple[int, float]]:
+    if all(len(word) < 3 for word in _WORD.findall(q)):
+        return _short_postgres(db, q, limit)
+    rows = db.execute(
+        text(
+            f"SELECT id, ts_rank_cd({_PG_DOCUMENT}, query) + greatest(similarity(skill, :q), word_similarity(:q, {_PG_TEXT})) AS score "
+            f"FROM skills, websearch_to_tsquery('english', :q) AS query "
+            f"WHERE {_PG_DOCUMENT} @@ query OR skill % :q OR :q <% {_PG_TEXT} "
+            f"ORDER BY score DESC, id LIMIT :limit"
+        ),
+        {"q": q, "limit": limit}
+    )
+    return [(row.id, row.score) for row in rows]
+
+def rank_skills(db: Session, q: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Tuple[int, float]]:
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgres(db, q, limit)
+    return _search_sqlite(db, q, limit)
@@ -0,0 +1,166 @@
+import argparse
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session
+
+from models import Booking, ProviderStats, Skill, SkillStats, User
+
+DEFAULT_TOP_SKILLS = 10
+MAX_TOP_SKILLS = 100
+
+PROVIDER_COLUMNS = ("pending", "accepted", "completed", "cancelled", "hours_booked", "hours_completed")
+SKILL_COLUMNS = ("bookings", "completed", "hours_booked")
+
+class BookingChange(NamedTuple):
+    provider_id: int
+    skill_id: int
+    duration_hours: int
+    old_status: Optional[str]
+    new_status: Optional[str]
+
+def _contribution(status: Optional[str], hours: int) -> Tuple[Dict[str, int], Dict[str, int]]:
+    if status is None:
+        return {}, {}
+    live = status != "cancelled"
+    done = status == "completed"
+    provider = {status: 1, "hours_booked": hours if live else 0, "hours_completed": hours if done else 0}
+    skill = {"bookings": int(live), "completed": int(done), "hours_booked": hours if live else 0}
+    return provider, skill
+
+def _deltas(changes: Iterable[BookingChange]) -> Tuple[Dict[int, Dict[str, int]], Dict[int, Dict[str, int]]]:
+    providers: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(PROVIDER_COLUMNS, 0))
+    skills: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(SKILL_COLUMNS, 0))
+    for change in changes:
+        for status, sign in ((change.old_status, -1), (change.new_status, 1)):
+            provider, skill = _contribution(status, change.duration_hours)
+            for column, value in provider.items():
+                providers[change.provider_id][column] += sign * value
+            for column, value in skill.items():
+                skills[change.skill_id][column] += sign * value
+    return providers, skills
+
+def _upsert(db: Session, model, key: str, columns: Tuple[str, ...], deltas: Dict[int, Dict[str, int]]) -> None:
+    rows = [dict(values, **{key: row_key}) for row_key, values in sorted(deltas.items()) if any(values.values())]
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[key],
+                set_={column: table.c[column] + statement.excluded[column] for column in columns}
+            ),
+            rows
+        )
+        return
+    for row in rows:
+        result = db.execute(
+            update(table).where(table.c[key] == row[key]).values({column: table.c[column] + row[column] for column in columns})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(row))
+
+def record(db: Session, changes: Iterable[BookingChange]) -> None:
+    providers, skills = _deltas(changes)
+    _upsert(db, ProviderStats, "provider_id", PROVIDER_COLUMNS, providers)
+    _upsert(db, SkillStats, "skill_id", SKILL_COLUMNS, skills)
+
+def provider_stats(db: Session, provider_id: int) -> dict:
+    row = db.get(ProviderStats, provider_id)
+    return (row or ProviderStats(provider_id=provider_id, **dict.fromkeys(PROVIDER_COLUMNS, 0))).to_dict()
+
+def _top_skills_query(db: Session, limit: int) -> Query:
+    top = (
+        select(SkillStats)
+        .where(SkillStats.bookings > 0)
+        .order_by(SkillStats.bookings.desc(), SkillStats.skill_id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        db.query(top.c.skill_id, Skill.skill, Skill.user_id, User.name.label("user_name"), top.c.bookings, top.c.completed, top.c.hours_booked)
+        .join(Skill, Skill.id == top.c.skill_id)
+        .join(User, User.id == Skill.user_id)
+        .order_by(top.c.bookings.desc(), top.c.skill_id.desc())
+    )
+
+def top_skills(db: Session, limit: int = DEFAULT_TOP_SKILLS) -> List[dict]:
+    return [row._asdict() for row in _top_skills_query(db, limit)]
+
+def _provider_totals():
+    live = Booking.status != "cancelled"
+    return select(
+        Booking.provider_id,
+        *(func.sum(case((Booking.status == status, 1), else_=0)).label(status) for status in ("pending", "accepted", "completed", "cancelled")),
+        func.sum(case((live, Booking.duration_hours), else_=0)).label("hours_booked"),
+        func.sum(case((Booking.status == "completed", Booking.duration_hours), else_=0)).label("hours_completed"),
+    ).group_by(Booking.provider_id)
+
+def _skill_totals():
+    live = Booking.status != "cancelled"
+    return select(
+        Booking.skill_id,
+        func.sum(case((live, 1), else_=0)).label("bookings"),
+        func.sum(case((Booking.status == "completed", 1), else_=0)).label("completed"),
+        func.sum(case((live, Booking.duration_hours), else_=0)).label("hours_booked"),
+    ).group_by(Booking.skill_id)
+
+def rebuild(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("LOCK TABLE bookings IN SHARE MODE"))
+    conn.execute(delete(ProviderStats))
+    conn.execute(delete(SkillStats))
+    conn.execute(insert(ProviderStats).from_select(("provider_id",) + PROVIDER_COLUMNS, _provider_totals()))
+    conn.execute(insert(SkillStats).from_select(("skill_id",) + SKILL_COLUMNS, _skill_totals()))
+
+def _compare(name: str, expected: dict, actual: dict, columns: Tuple[str, ...]) -> List[str]:
+    zero = dict.fromkeys(columns, 0)
+    return [
+        f"{name} {key}: expected {expected.get(key, zero)}, stored {actual.get(key, zero)}"
+        for key in sorted(set(expected) | set(actual))
+        if expected.get(key, zero) != actual.get(key, zero)
+    ]
+
+def verify(conn: Connection) -> List[str]:
+    def rows(query, columns):
+        return {row[0]: dict(zip(columns, row[1:])) for row in conn.execute(query)}
+
+    provider_table, skill_table = ProviderStats.__table__, SkillStats.__table__
+    return _compare(
+        "provider", rows(_provider_totals(), PROVIDER_COLUMNS),
+        rows(select(provider_table.c.provider_id, *(provider_table.c[column] for column in PROVIDER_COLUMNS)), PROVIDER_COLUMNS),
+        PROVIDER_COLUMNS
+    ) + _compare(
+        "skill", rows(_skill_totals(), SKILL_COLUMNS),
+        rows(select(skill_table.c.skill_id, *(skill_table.c[column] for column in SKILL_COLUMNS)), SKILL_COLUMNS),
+        SKILL_COLUMNS
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or check the booking statistics tables against the bookings table")
+    parser.add_argument("command", choices=["verify", "rebuild"], nargs="?", default="verify")
+    args = parser.parse_args()
+
+    from database import engine
+
+    with engine.begin() as conn:
+        if args.command == "rebuild":
+            rebuild(conn)
+        problems = verify(conn)
+    for problem in problems:
+        print(problem)
+    print(f"{args.command}: {len(problems)} mismatched rows")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
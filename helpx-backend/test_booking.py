@@ -55,8 +55,8 @@ def test_bookings():
             print("🔄 TESTING STATUS UPDATE")
             print("=" * 50)
             
-            updated = crud.update_booking_status(db, new_booking.id, "accepted")
-            print(f"✅ Status updated to: {updated.status}")
+            updated = crud.transition_booking(db, new_booking.id, "accepted", provider.id)
+            print(f"✅ Status updated to: {updated['status']}")
             
             retrieved = crud.get_booking_by_id(db, new_booking.id)
             print(f"✅ Verified from DB: {retrieved.status}")
@@ -0,0 +1,41 @@
+import threading
+import time
+
+import pytest
+
+import firebase_auth
+
+class CountingVerifier(firebase_auth.GoogleTokenVerifier):
+    def __init__(self, certs: dict):
+        super().__init__()
+        self.served = certs
+        self.fetched = 0
+
+    def fetch_keys(self):
+        self.fetched += 1
+        time.sleep(0.05)
+        return dict(self.served), 3600
+
+def test_concurrent_unknown_kids_share_one_fetch(monkeypatch):
+    monkeypatch.setattr(firebase_auth, "FIREBASE_KEYS_MIN_REFRESH_SECONDS", 0)
+    verifier = CountingVerifier({"old": "cert"})
+    verifier.refresh_keys()
+    verifier.served = {"old": "cert", "new": "cert"}
+    threads = [threading.Thread(target=verifier._keys, args=("new",)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert verifier.fetched == 2
+    assert "new" in verifier._keys("new")
+
+def test_unknown_kid_is_rejected_after_one_throttled_refresh():
+    verifier = CountingVerifier({"old": "cert"})
+    verifier.refresh_keys()
+    verifier._fetched_at -= firebase_auth.FIREBASE_KEYS_MIN_REFRESH_SECONDS
+    with pytest.raises(ValueError, match="unknown key id"):
+        verifier._keys("forged-1")
+    assert verifier.fetched == 2
+    with pytest.raises(ValueError, match="unknown key id"):
+        verifier._keys("forged-2")
+    assert verifier.fetched == 2
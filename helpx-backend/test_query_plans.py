@@ -0,0 +1,86 @@
+import os
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Query, Session, sessionmaker
+
+import crud
+import migrations
+import stats
+from models import User, Skill, Booking, ProviderStats
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+USERS = 500
+SKILLS = 5000
+BOOKINGS = 20000
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    url = TEST_DATABASE_URL or f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    engine = create_engine(url)
+    migrations.reset(engine)
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "hashed_password": "x"} for i in range(1, USERS + 1)])
+        conn.execute(insert(Skill), [{"id": i, "skill": f"Skill {i}", "user_id": i % USERS + 1} for i in range(1, SKILLS + 1)])
+        conn.execute(insert(Booking), [
+            {"id": i, "customer_id": i % USERS + 1, "provider_id": (i * 7) % USERS + 1, "skill_id": i % SKILLS + 1, "status": "pending",
+             "booking_date": datetime(2030, 1, 1) + timedelta(hours=i) if i % 3 else None}
+            for i in range(1, BOOKINGS + 1)
+        ])
+        stats.rebuild(conn)
+        conn.execute(text("ANALYZE"))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    migrations.reset(engine)
+    engine.dispose()
+
+def explain(db: Session, query: Query) -> str:
+    bind = db.get_bind()
+    sql = str(query.statement.compile(bind, compile_kwargs={"literal_binds": True}))
+    if bind.dialect.name == "postgresql":
+        db.execute(text("SET enable_seqscan = off"))
+        plan = "\n".join(row[0] for row in db.execute(text(f"EXPLAIN {sql}")))
+        db.execute(text("RESET enable_seqscan"))
+        return plan
+    return "\n".join(row.detail for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+def sequential_scans(plan: str) -> list:
+    return re.findall(r"Seq Scan on (\w+)", plan) + re.findall(r"^SCAN (?!anon_)(\w+)$", plan, re.MULTILINE)
+
+HOT_QUERIES = {
+    "skills page": lambda db: crud._keyset(crud._skills_query(db), 2500, 100),
+    "skills by user": lambda db: crud._keyset(crud._skills_query(db, 7), None, 100),
+    "skill by id": lambda db: crud._skill_query(db).filter(Skill.id == 42),
+    "user by email": lambda db: db.query(User).filter(User.email == "user7@example.com"),
+    "booking by id": lambda db: crud._booking_query(db).filter(Booking.id == 42),
+    "bookings as customer": lambda db: crud._bookings_for_user_query(db, 7, as_customer=True, limit=100),
+    "bookings as provider": lambda db: crud._bookings_for_user_query(db, 7, as_provider=True, limit=100),
+    "bookings for user": lambda db: crud._bookings_for_user_query(db, 7, limit=100),
+    "bookings for user after cursor": lambda db: crud._bookings_for_user_query(db, 7, after=10000, limit=100),
+    "bookings by booking date": lambda db: crud._bookings_for_user_query(db, 7, sort="booking_date", limit=100),
+    "bookings by booking date after cursor": lambda db: crud._bookings_for_user_query(
+        db, 7, sort="booking_date", after=(datetime(2030, 1, 1), 500), limit=100
+    ),
+    "bookings in date range": lambda db: crud._bookings_for_user_query(
+        db, 7, sort="booking_date", start=datetime(2030, 1, 1), end=datetime(2030, 2, 1), limit=100
+    ),
+    "newest bookings with status": lambda db: crud._bookings_for_user_query(
+        db, 7, statuses=["pending", "accepted"], sort="created_at", descending=True, limit=100
+    ),
+    "provider stats": lambda db: db.query(ProviderStats).filter(ProviderStats.provider_id == 7),
+    "top skills": lambda db: stats._top_skills_query(db, 10),
+}
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_index(db, name):
+    plan = explain(db, HOT_QUERIES[name](db))
+    assert not sequential_scans(plan), f"{name} falls back to a sequential scan:\n{plan}"
+
+def test_migrations_are_recorded(db):
+    assert migrations.current_version(db.get_bind()) == migrations.MIGRATIONS[-1].version
+    assert migrations.upgrade(db.get_bind()) == []
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import recommend
+
+WORDS = ["guitar", "piano", "python", "chess", "pottery", "spanish", "yoga", "cooking", "drawing", "tennis"]
+
+def make_rows(rng: random.Random, start: int, count: int) -> list:
+    return [
+        {"id": skill_id, "skill": rng.choice(WORDS), "description": " ".join(rng.choices(WORDS, k=rng.randint(1, 8))), "user_id": skill_id % 7 + 1}
+        for skill_id in range(start, start + count)
+    ]
+
+def exact_scan(index: recommend.SkillIndex, rows: list, vector: dict, limit: int) -> list:
+    frequency = {term: len(index._postings[term][1]) for term in vector if term in index._postings}
+    scores = {}
+    for row in rows:
+        weights = recommend.vectorize(recommend.skill_terms(row["skill"], row["description"]))
+        score = sum(index.idf(frequency[term]) ** 2 * weight * weights[term] for term, weight in vector.items() if term in weights)
+        if score:
+            scores[row["id"]] = score
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+@pytest.fixture
+def index():
+    rng = random.Random(7)
+    loaded, added = make_rows(rng, 1, 3000), make_rows(rng, 3001, 500)
+    index = recommend.SkillIndex()
+    index.start_building()
+    index.load(loaded)
+    for row in added:
+        index.add([row])
+    return index, loaded + added
+
+def test_top_k_matches_exact_scan(index):
+    index, rows = index
+    vector = recommend.vectorize(recommend.skill_terms("guitar", "piano lessons"))
+    found = index.query(vector, 10)
+    expected = exact_scan(index, rows, vector, 10)
+    assert [score for _, score in found] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+def test_scan_limit_reads_postings_in_weight_order(index, monkeypatch):
+    index, rows = index
+    monkeypatch.setattr(recommend, "RECOMMEND_SCAN_LIMIT", 50)
+    vector = recommend.vectorize(recommend.skill_terms("chess", None))
+    best = exact_scan(index, rows, vector, 1)[0][1]
+    keys, _ = index._sorted("chess")
+    assert list(keys) == sorted(keys)
+    assert index.query(vector, 1)[0][1] == pytest.approx(best, rel=1e-5)
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import crud
+import migrations
+import response_cache
+
+TABLES = ("skills", "users")
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    migrations.upgrade(engine)
+    response_cache._versions.clear()
+    yield engine
+    engine.dispose()
+
+def versions(engine) -> tuple:
+    with Session(engine) as db:
+        return response_cache.load_versions(db, TABLES)
+
+def test_write_in_process_changes_versions_at_once(engine):
+    before = versions(engine)
+    with Session(engine) as db:
+        user = crud.create_user(db, name="Ada", email="ada@example.com", hashed_password="x")
+        crud.create_skill(db, skill="Chess", description="Openings", user_id=user.id)
+    assert versions(engine) == (before[0] + 1, before[1] + 1)
+
+def test_write_from_another_process_changes_versions(engine, tmp_path):
+    before = versions(engine)
+    users = tmp_path / "users.csv"
+    users.write_text("name,email,hashed_password\nGrace,grace@example.com,x\n")
+    subprocess.run(
+        [sys.executable, "bulk_import.py", "users", str(users), "--url", str(engine.url), "--workers", "1"],
+        check=True, capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    time.sleep(response_cache.RESPONSE_CACHE_VERSION_TTL)
+    assert versions(engine) == (before[0], before[1] + 1)
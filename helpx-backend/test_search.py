@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import crud
+import migrations
+import search
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    migrations.upgrade(engine)
+    search._vocabularies.clear()
+    with Session(engine) as db:
+        user = crud.create_user(db, name="Ada", email="ada@example.com", hashed_password="x")
+        for skill, description in (
+            ("Python", "Tutoring for beginners"),
+            ("Guitar", "Acoustic lessons"),
+            ("Chess", "Openings and endgames"),
+            ("Pottery", "Wheel throwing"),
+        ):
+            crud.create_skill(db, skill=skill, description=description, user_id=user.id)
+        yield db
+    engine.dispose()
+
+def names(db, q: str) -> list:
+    return [skill.skill for skill, _ in crud.search_skills(db, q)]
+
+def test_misspelled_query_finds_the_skill(db):
+    assert names(db, "pyhton") == ["Python"]
+    assert names(db, "guitr") == ["Guitar"]
+
+def test_misspelled_description_word_is_matched(db):
+    assert names(db, "openigns") == ["Chess"]
+
+def test_short_query_falls_back_to_prefix(db):
+    assert names(db, "p") == ["Pottery", "Python"]
+    assert names(db, "Gu") == ["Guitar"]
+
+def test_unrelated_query_finds_nothing(db):
+    assert names(db, "zzzzzz") == []
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+from datetime import timedelta
+from urllib.request import urlopen
+
+import orjson
+import uvicorn
+import websockets
+
+import logging_config
+import main
+from auth import create_access_token
+
+def _serve(sock: socket.socket):
+    server = uvicorn.Server(uvicorn.Config(main.app, lifespan="off", log_config=None, ws="websockets"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        threading.Event().wait(0.01)
+    return server, thread
+
+async def _subscribe(port: int, token: str) -> dict:
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/bookings?token={token}") as websocket:
+        await websocket.send(orjson.dumps({"type": "auth", "token": token}).decode())
+        return orjson.loads(await websocket.recv())
+
+async def _rejected(port: int) -> int:
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/bookings") as websocket:
+        await websocket.send(orjson.dumps({"type": "auth", "token": "not-a-token"}).decode())
+        try:
+            await websocket.recv()
+        except websockets.ConnectionClosed as closed:
+            return closed.rcvd.code
+
+async def _closed_code(port: int, token: str) -> int:
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/bookings") as websocket:
+        await websocket.send(orjson.dumps({"type": "auth", "token": token}).decode())
+        try:
+            while True:
+                await asyncio.wait_for(websocket.recv(), 10)
+        except websockets.ConnectionClosed as closed:
+            return closed.rcvd.code
+
+def _listen():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server, thread = _serve(sock)
+    return sock, server, thread
+
+def _stop(sock, server, thread):
+    server.should_exit = True
+    thread.join(5)
+    sock.close()
+
+def test_socket_closes_when_token_expires():
+    token = create_access_token({"sub": 4242}, expires_delta=timedelta(seconds=2))
+    sock, server, thread = _listen()
+    try:
+        started = time.monotonic()
+        assert asyncio.run(_closed_code(sock.getsockname()[1], token)) == 1008
+        assert time.monotonic() - started < 5
+    finally:
+        _stop(sock, server, thread)
+
+def test_socket_closes_when_sender_fails(monkeypatch, caplog):
+    async def failing(websocket, queue):
+        await websocket.send_text(await queue.get())
+        raise RuntimeError("broker gone")
+
+    monkeypatch.setattr(main, "_forward_events", failing)
+    caplog.set_level(logging.WARNING)
+    sock, server, thread = _listen()
+    try:
+        assert asyncio.run(_closed_code(sock.getsockname()[1], create_access_token({"sub": 4242}))) == 1011
+    finally:
+        _stop(sock, server, thread)
+    assert any(getattr(record, "event", None) == "events.sender_failed" for record in caplog.records)
+    assert not any("never retrieved" in record.getMessage() for record in caplog.records)
+
+def test_access_token_never_logged(caplog):
+    logging_config.filter_server_logs()
+    caplog.set_level(logging.INFO)
+    token = create_access_token({"sub": 4242})
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server, thread = _serve(sock)
+    try:
+        assert asyncio.run(_subscribe(port, token)) == {"type": "subscribed"}
+        assert asyncio.run(_rejected(port)) == 1008
+        assert urlopen(f"http://127.0.0.1:{port}/?token={token}").status == 200
+    finally:
+        server.should_exit = True
+        thread.join(5)
+        sock.close()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("/ws/bookings" in message for message in messages)
+    assert any('"GET / HTTP/1.1" 200' in message for message in messages)
+    for record in caplog.records:
+        assert token not in record.getMessage()
+        assert token not in repr(vars(record))